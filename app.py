@@ -3,18 +3,105 @@ import time
 from datetime import datetime
 
 import tkinter as tk
-from tkinter import messagebox
 
 from config import Config, SettingsDialog, SettingsManager
-from storage import DataManager, InstanceLock, StoragePaths
-from system_utils import SystemUtils
+from storage import DataManager, DataWriter, InstanceLock, StoragePaths
+from system_utils import HotKey, KeyHook, SessionWatcher, SystemUtils
 from ui import FishMoneyUI
 
 
+NS_PER_SEC = 1_000_000_000
+NS_PER_MS = 1_000_000
+# 固定参数预先换算成整数纳秒（LOCK_GRACE_PERIOD 可被重新配置，使用时再换算）
+MAX_DELTA_NS = int(Config.MAX_DELTA * NS_PER_SEC)
+SAVE_INTERVAL_NS = int(Config.SAVE_INTERVAL * NS_PER_SEC)
+SYSTEM_POLL_INTERVAL_NS = int(Config.SYSTEM_POLL_INTERVAL * NS_PER_SEC)
+TOPMOST_FALLBACK_CHECK_INTERVAL_NS = int(Config.TOPMOST_FALLBACK_CHECK_INTERVAL * NS_PER_SEC)
+
+
 # ==========================================
 # 主程序
 # ==========================================
 class FishMoneyApp(FishMoneyUI):
+    # 长驻进程、每 tick 高频读写属性：用 __slots__ 省掉实例 __dict__
+    __slots__ = (
+        "root",
+        # 计费数据
+        "current_date",
+        "earned_money",
+        "settled_date",
+        "history",
+        "last_after_work_usage",
+        "data_writer",
+        "_last_saved_snapshot",
+        "base_salary_per_second",
+        "_rate_by_weekday",
+        "_state_table",
+        # 显隐 / 托盘 / 老板键
+        "is_visible",
+        "boss_key_pressed",
+        "boss_key_hook",
+        "is_in_tray",
+        "tray_icon",
+        "tray_thread",
+        "is_paused",
+        "_topmost_state",
+        "_lift_after_id",
+        # 弹窗与菜单
+        "is_modal_open",
+        "is_context_menu_open",
+        "_grab_pending",
+        "settings_dialog",
+        "_settings_opening",
+        "details_window",
+        "details_opening",
+        "_details_rows",
+        "_recent_week_keys",
+        "_recent_week_date",
+        "menu",
+        "menu_pause_index",
+        "_menu_pause_label",
+        # 主循环计时
+        "last_update_time_ns",
+        "last_save_time_ns",
+        "_next_tick_ns",
+        "_after_id",
+        "_loop_suspended",
+        "_today_ord",
+        "_today_str",
+        "_today_rate",
+        "_last_usage_minute",
+        "lock_start_time_ns",
+        "session_watcher",
+        "_last_sys_poll_ns",
+        "_cached_locked",
+        "_cached_idle",
+        "_last_topmost_fallback_ns",
+        # 显示缓存
+        "canvas",
+        "_money_font",
+        "_text_font",
+        "_title_font",
+        "text_ids",
+        "main_text_id",
+        "_ui_state",
+        "_last_display_text",
+        "_last_money_value",
+        "_last_rounded_money",
+        "_last_prefix",
+        # 落盘
+        "is_dirty",
+        "save_requested",
+        "save_durable",
+        # 拖动
+        "is_dragging",
+        "drag_offset_x",
+        "drag_offset_y",
+        "_pending_move",
+        "_last_move",
+        "_move_after_id",
+    )
+
     def __init__(self, root: tk.Tk):
         self.root = root
 
@@ -25,7 +112,11 @@ class FishMoneyApp(FishMoneyUI):
             self.history,
             self.last_after_work_usage,
         ) = DataManager.load()
-        self.base_salary_per_second = self.calculate_base_rate()
+        self.data_writer = DataWriter(on_error=self._on_background_save_failed)
+        self._last_saved_snapshot = None
+        atexit.register(self.data_writer.close)
+        self.refresh_rates()
+        self._state_table = self.build_state_table()
 
         self.is_visible = True
         self.boss_key_pressed = False
@@ -36,63 +127,119 @@ class FishMoneyApp(FishMoneyUI):
 
         self.is_paused = False  # —— 右键菜单新增：暂停计费 ——
 
-        self._original_exstyle = None
+        self._topmost_state = False
+        self._lift_after_id = None
         self.is_modal_open = False
         self.is_context_menu_open = False
+        self._grab_pending = False
         self.settings_dialog = None
         self._settings_opening = False
 
-        now_m = time.monotonic()
-        self.last_update_time_m = now_m
-        self.last_save_time_m = now_m
-
-        self.lock_start_time_m = None
-
-        self._last_display_text = None
-        self._last_color = None
-        self._last_alpha = None
+        now_ns = time.perf_counter_ns()
+        self.last_update_time_ns = now_ns
+        self.last_save_time_ns = now_ns
+        self._next_tick_ns = now_ns
+        self._after_id = None
+        self._loop_suspended = False
+
+        # 日期键缓存：按 ordinal 判断跨天，只在换日时 strftime 并取当天费率
+        self._today_ord = None
+        self._today_str = ""
+        self._today_rate = 0.0
+        self._last_usage_minute = None
+
+        self.lock_start_time_ns = None
+
+        # 锁屏：优先订阅系统会话通知，注册失败时才轮询 OpenInputDesktop
+        self.session_watcher = SessionWatcher.install()
+        if self.session_watcher is not None:
+            atexit.register(self.session_watcher.stop)
+
+        # 锁屏/空闲采样缓存
+        self._last_sys_poll_ns = None
+        self._cached_locked = None
+        self._cached_idle = 0.0
+
+        # 上次写入 UI 的 (文本, 颜色, 透明度)
+        self._ui_state = (None, None, None)
+        self._last_display_text = ""
+        self._last_money_value = None
+        self._last_rounded_money = None
+        self._last_prefix = None
 
         self.is_dirty = False
         self.save_requested = False
+        self.save_durable = False
 
         # 置顶：事件驱动为主 + 低频兜底
-        self._last_topmost_fallback_m = 0.0
+        self._last_topmost_fallback_ns = 0
 
         self.details_window = None
         self.details_opening = False
+        self._details_rows = None
+        self._recent_week_keys = None
+        self._recent_week_date = None
 
         # 拖动
         self.is_dragging = False
         self.drag_offset_x = 0
         self.drag_offset_y = 0
+        self._pending_move = None
+        self._last_move = None
+        self._move_after_id = None
 
         self.setup_window()
         self.create_widgets()
-        self.create_context_menu()
+        # 右键菜单在第一次右键时才创建
+        self.menu = None
         self.bind_events()
 
         self.update_loop()
 
+        # 老板键：优先用键盘钩子（按键照常传给其它程序）；钩子装不上再注册系统热键
+        # （热键会独占该键），都不行再降级为轮询
+        self.boss_key_hook = KeyHook.install(Config.BOSS_KEY, self._on_boss_key_hook)
+        if self.boss_key_hook is None:
+            self.boss_key_hook = HotKey.install(Config.BOSS_KEY, self._on_boss_key_hook)
+        if self.boss_key_hook is not None:
+            atexit.register(self.boss_key_hook.stop)
+        else:
+            self.boss_key_loop()
+
     def calculate_base_rate(self) -> float:
         daily = Config.MONTHLY_SALARY / Config.WORK_DAYS_PER_MONTH
         return daily / (Config.WORK_HOURS_PER_DAY * 3600)
 
-    def get_rate_multiplier(self) -> float:
-        wd = datetime.now().weekday()  # 0=Mon ... 5=Sat 6=Sun
-        return Config.WEEKEND_MULTIPLIER if wd >= 5 else 1.0
+    def get_rate_multiplier(self, weekday: int) -> float:
+        # 0=Mon ... 5=Sat 6=Sun
+        return Config.WEEKEND_MULTIPLIER if weekday >= 5 else 1.0
 
-    def get_time_status(self) -> str:
-        now_time = datetime.now().time()
-        if now_time < Config.WORK_START:
+    def refresh_rates(self):
+        # 配置变化时重算；主循环按星期直接取表，不再逐 tick 相乘
+        self.base_salary_per_second = self.calculate_base_rate()
+        self._rate_by_weekday = tuple(
+            self.base_salary_per_second * self.get_rate_multiplier(wd) for wd in range(7)
+        )
+        # 让下一次 today_key 重新取当天费率
+        self._today_ord = None
+
+    def get_time_status(self, minute_of_day: int) -> str:
+        # 设置只精确到分钟，按分钟整数比较与按 time 比较结果一致
+        if minute_of_day < Config.WORK_START_MIN:
             return "BEFORE_WORK"
-        if Config.LUNCH_START <= now_time < Config.LUNCH_END:
+        if Config.LUNCH_START_MIN <= minute_of_day < Config.LUNCH_END_MIN:
             return "LUNCH"
-        if now_time >= Config.WORK_END:
+        if minute_of_day >= Config.WORK_END_MIN:
             return "OFF_WORK"
         return "WORKING_HOURS"
 
-    def maybe_rollover_day(self, now: datetime, now_m: float, locked_state: bool | None):
-        today = now.strftime("%Y-%m-%d")
+    def maybe_rollover_day(
+        self,
+        minute_of_day: int,
+        today: str,
+        now_ns: int,
+        locked_state: bool | None,
+    ):
         if today != self.current_date:
             if self.settled_date != self.current_date:
                 try:
@@ -100,208 +247,285 @@ class FishMoneyApp(FishMoneyUI):
                 except Exception:
                     pass
                 self.settled_date = self.current_date
-                self.mark_dirty(request_save=True)
+                self.mark_dirty(request_save=True, durable=True)
 
             self.current_date = today
             self.earned_money = 0.0
+            # 截止日期随换日前移：此时裁剪一次内存中的历史，之后当天的保存无需再裁剪
+            self.history, self.last_after_work_usage = DataManager.prune(self.history, self.last_after_work_usage)
             if locked_state is not True:
-                self.lock_start_time_m = None
+                self.lock_start_time_ns = None
 
-            self.last_update_time_m = now_m
-            self.last_save_time_m = now_m
+            self.last_update_time_ns = now_ns
+            self.last_save_time_ns = now_ns
 
-            self._last_display_text = None
-            self._last_color = None
-            self._last_alpha = None
+            self._ui_state = (None, None, None)
             self.mark_dirty(request_save=True)
 
-        if now.time() >= Config.WORK_END and self.settled_date != today:
+        if minute_of_day >= Config.WORK_END_MIN and self.settled_date != today:
             try:
                 self.history = DataManager.append_history(self.history, today, self.earned_money)
             except Exception:
                 pass
             self.settled_date = today
-            self.mark_dirty(request_save=True)
+            self.mark_dirty(request_save=True, durable=True)
 
-    def mark_dirty(self, request_save: bool = False):
+    def today_key(self, now: datetime) -> str:
+        today_ord = now.toordinal()
+        if today_ord != self._today_ord:
+            self._today_ord = today_ord
+            self._today_str = now.strftime("%Y-%m-%d")
+            self._today_rate = self._rate_by_weekday[now.weekday()]
+        return self._today_str
+
+    def mark_dirty(self, request_save: bool = False, durable: bool = False):
         self.is_dirty = True
         if request_save:
             self.save_requested = True
+        if durable:
+            # 结算类变更：下次保存带 fsync，平时的定时保存不 fsync
+            self.save_durable = True
 
-    def maybe_save(self, now_m: float):
-        if not (self.is_dirty or self.save_requested):
-            return
-        if self.save_requested or (now_m - self.last_save_time_m) > Config.SAVE_INTERVAL:
-            try:
-                DataManager.save(
-                    self.current_date,
-                    self.earned_money,
-                    self.settled_date,
-                    self.history,
-                    self.last_after_work_usage,
-                )
-            except Exception:
-                return
-            self.is_dirty = False
-            self.save_requested = False
-            self.last_save_time_m = now_m
+    def data_snapshot(self) -> tuple:
+        # 复制可变字典，后台写盘线程只读快照，不和主循环共享对象
+        return (
+            self.current_date,
+            self.earned_money,
+            self.settled_date,
+            dict(self.history),
+            dict(self.last_after_work_usage),
+        )
+
+    def _do_save(self, now_ns: int):
+        # 热路径在调用处内联判断，只有确实要落盘时才进来
+        snapshot = self.data_snapshot()
+        # 与上次交给写盘线程的快照相同（如暂停/午休期间的重复请求）则不再序列化写盘
+        if snapshot != self._last_saved_snapshot:
+            self.data_writer.submit(snapshot, self.save_durable)
+            self._last_saved_snapshot = snapshot
+        self.is_dirty = False
+        self.save_requested = False
+        self.save_durable = False
+        self.last_save_time_ns = now_ns
+
+    def _on_background_save_failed(self, durable: bool = False):
+        # 后台写盘失败：切回 Tk 线程重新标脏，下个间隔重试
+        try:
+            self.root.after(0, self._retry_save, durable)
+        except Exception:
+            pass
+
+    def _retry_save(self, durable: bool = False):
+        # 失败的是要求持久化的快照时，重试也保留 durable
+        self._last_saved_snapshot = None
+        self.mark_dirty(durable=durable)
+
+    # 显示状态：(前缀, 颜色, 透明度, 是否计费, 下次刷新间隔 ms)
+    LOCK_EXPIRED_STATE = ("🛑", "#FF4500", 0.85, False, Config.SLOW_REFRESH_RATE)
+
+    @staticmethod
+    def build_state_table() -> dict:
+        # 把状态分支预先展开成查表：键为 (时段, 锁屏状态, 是否空闲, 是否暂停)
+        paused = ("⏸", "#B0B0B0", 0.75, False, Config.SLOW_REFRESH_RATE)
+        before_work = ("🌙", Config.COLOR_PAUSED, 0.7, False, Config.SLOW_REFRESH_RATE)
+        lunch = ("🍱", "#FFA500", 0.85, False, Config.SLOW_REFRESH_RATE)
+        off_work = ("🏠", "#00BFFF", 0.85, False, Config.SLOW_REFRESH_RATE)
+        toilet = ("🚽", Config.COLOR_TOILET, 1.0, True, Config.REFRESH_RATE)
+        # 锁屏状态未知：不走“锁屏带薪”逻辑，仍允许 idle 计费，淡紫提示
+        unknown_lock = ("??", "#E6E6FA", 0.95, True, Config.REFRESH_RATE)
+        earning = ("$$", Config.COLOR_EARNING, 1.0, True, Config.REFRESH_RATE)
+        not_idle = ("Zz", Config.COLOR_PAUSED, 0.55, False, Config.IDLE_REFRESH_RATE)
+
+        table = {}
+        for time_status in ("BEFORE_WORK", "LUNCH", "OFF_WORK", "WORKING_HOURS"):
+            for locked_state in (True, False, None):
+                for is_idle in (True, False):
+                    if time_status == "BEFORE_WORK":
+                        state = before_work
+                    elif time_status == "LUNCH":
+                        state = lunch
+                    elif time_status == "OFF_WORK":
+                        state = off_work
+                    elif locked_state is True:
+                        state = toilet
+                    elif not is_idle:
+                        state = not_idle
+                    elif locked_state is None:
+                        state = unknown_lock
+                    else:
+                        state = earning
+                    table[(time_status, locked_state, is_idle, False)] = state
+                    # 暂停：任何状态都不加钱，但仍显示
+                    table[(time_status, locked_state, is_idle, True)] = paused
+        return table
+
+    def format_display(self, prefix: str) -> str:
+        # 不计费的 tick 金额原样不变：连 round 都省掉，直接复用上次的字符串
+        money = self.earned_money
+        if money == self._last_money_value and prefix == self._last_prefix:
+            return self._last_display_text
+        self._last_money_value = money
+        # 四位小数没进位且状态前缀不变时复用上次的字符串，不重复格式化
+        rounded = round(money, 4)
+        if rounded != self._last_rounded_money or prefix != self._last_prefix:
+            self._last_display_text = f"{prefix} {rounded:.4f}"
+            self._last_rounded_money = rounded
+            self._last_prefix = prefix
+        return self._last_display_text
 
     def update_ui_if_needed(self, display_text: str, color: str, alpha: float):
-        if display_text == self._last_display_text and color == self._last_color and alpha == self._last_alpha:
+        state = (display_text, color, alpha)
+        if state == self._ui_state:
             return
+        last_text, last_color, last_alpha = self._ui_state
 
-        for tid in self.text_ids:
-            self.canvas.itemconfig(tid, text=display_text)
-        self.canvas.itemconfig(self.main_text_id, text=display_text, fill=color)
+        if display_text != last_text:
+            # 描边阴影与主文字共用 "money" 标签，一次调用改完全部文本
+            self.canvas.itemconfigure("money", text=display_text)
+        if color != last_color:
+            self.canvas.itemconfigure(self.main_text_id, fill=color)
 
-        try:
-            self.root.attributes("-alpha", alpha)
-        except Exception:
-            pass
+        # 透明度单独比较：每次设置都会触发窗口合成刷新；状态表里都是固定字面量，直接比较即可
+        if alpha != last_alpha:
+            try:
+                self.root.attributes("-alpha", alpha)
+            except Exception:
+                pass
 
-        self._last_display_text = display_text
-        self._last_color = color
-        self._last_alpha = alpha
+        self._ui_state = (display_text, color, alpha)
 
     def update_loop(self):
-        now_m = time.monotonic()
-        locked_state = SystemUtils.is_workstation_locked()
-        idle_time = SystemUtils.get_idle_time()
+        now_ns = time.perf_counter_ns()
+        # 每 tick 只取一次墙钟时间，派生值传给各个 helper
         now = datetime.now()
-        self.maybe_rollover_day(now, now_m, locked_state)
-
-        # 老板键：边沿触发
-        if SystemUtils.is_key_pressed(Config.BOSS_KEY):
-            if not self.boss_key_pressed:
-                self.toggle_visibility()
-                self.boss_key_pressed = True
+        minute_of_day = now.hour * 60 + now.minute
+        today = self.today_key(now)
+        time_status = self.get_time_status(minute_of_day)
+        # 锁屏/空闲只在会被用到的状态下查询：午休、暂停与隐藏时查表结果与之无关，省掉 Win32 调用
+        if self.is_visible and (time_status == "OFF_WORK" or not (self.is_paused or time_status == "LUNCH")):
+            locked_state, idle_time = self.sample_system_state(now_ns)
         else:
-            self.boss_key_pressed = False
+            locked_state, idle_time = self._cached_locked, 0.0
+        self.maybe_rollover_day(minute_of_day, today, now_ns, locked_state)
 
         # —— 4) 置顶：低频兜底（事件驱动为主）——
-        self.topmost_fallback_check(now_m)
+        self.topmost_fallback_check(now_ns)
 
-        # 隐藏时：不计费，防 delta 爆炸
+        # 隐藏时：不计费。隐藏路径都会 suspend_loop，这里不再续排 tick，
+        # 否则 resume_loop 会再起一个循环、覆盖 _after_id，留下无法取消的第二个循环
         if not self.is_visible:
-            self.last_update_time_m = now_m
-            self.maybe_save(now_m)
-            self.root.after(Config.REFRESH_RATE, self.update_loop)
+            self.last_update_time_ns = now_ns
             return
 
-        # delta（钳制）
-        delta = now_m - self.last_update_time_m
-        self.last_update_time_m = now_m
-        if delta < 0:
-            delta = 0.0
-        if delta > Config.MAX_DELTA:
-            delta = Config.MAX_DELTA
-
-        time_status = self.get_time_status()
-        self.maybe_update_last_after_work_usage(time_status, now, idle_time, locked_state)
-
-        display_text = ""
-        main_color = Config.COLOR_PAUSED
-        alpha = 0.6
-
-        mult = self.get_rate_multiplier()
-        rate = self.base_salary_per_second * mult
-
-        earned_before = self.earned_money
-
-        # 暂停：任何状态都不加钱，但仍显示
-        if self.is_paused:
-            display_text = f"⏸ {self.earned_money:.4f}"
-            main_color = "#B0B0B0"
-            alpha = 0.75
-            self.lock_start_time_m = None
-            self.update_ui_if_needed(display_text, main_color, alpha)
-            if self.earned_money != earned_before:
-                self.mark_dirty()
-            self.maybe_save(now_m)
-            self.root.after(Config.REFRESH_RATE, self.update_loop)
-            return
+        # delta（钳制）：单调时钟的整数纳秒差不会为负，只需限制上限
+        delta_ns = now_ns - self.last_update_time_ns
+        self.last_update_time_ns = now_ns
+        if delta_ns > MAX_DELTA_NS:
+            delta_ns = MAX_DELTA_NS
+        delta = delta_ns / NS_PER_SEC
 
-        if time_status == "BEFORE_WORK":
-            display_text = f"🌙 {self.earned_money:.4f}"
-            main_color = Config.COLOR_PAUSED
-            alpha = 0.7
-            if locked_state is True:
-                if self.lock_start_time_m is None:
-                    self.lock_start_time_m = now_m
-            else:
-                self.lock_start_time_m = None
-
-        elif time_status == "LUNCH":
-            display_text = f"🍱 {self.earned_money:.4f}"
-            main_color = "#FFA500"
-            alpha = 0.85
-            self.lock_start_time_m = None
-
-        elif time_status == "OFF_WORK":
-            display_text = f"🏠 {self.earned_money:.4f}"
-            main_color = "#00BFFF"
-            alpha = 0.85
-            self.lock_start_time_m = None
+        self.maybe_update_last_after_work_usage(time_status, now, minute_of_day, today, idle_time, locked_state)
 
+        # 锁屏计时只在上班前/工作时段的锁屏中进行，其余状态清零
+        if locked_state is True and not self.is_paused and time_status in ("BEFORE_WORK", "WORKING_HOURS"):
+            if self.lock_start_time_ns is None:
+                self.lock_start_time_ns = now_ns
         else:
-            # 工作时段：分锁屏 / 非锁屏 / 未知锁屏
-            if locked_state is True:
-                if self.lock_start_time_m is None:
-                    self.lock_start_time_m = now_m
-
-                locked_duration = now_m - self.lock_start_time_m
-                if locked_duration <= Config.LOCK_GRACE_PERIOD:
-                    self.earned_money += rate * delta
-                    display_text = f"🚽 {self.earned_money:.4f}"
-                    main_color = Config.COLOR_TOILET
-                    alpha = 1.0
-                else:
-                    display_text = f"🛑 {self.earned_money:.4f}"
-                    main_color = "#FF4500"
-                    alpha = 0.85
-
-            elif locked_state is None:
-                # 保守策略：锁屏状态未知 -> 不走“锁屏带薪”逻辑，避免误判
-                # 仍然允许 idle 计费（你也可以改成完全停计费，看你想保守到哪一步）
-                self.lock_start_time_m = None
-                if idle_time >= Config.IDLE_THRESHOLD:
-                    self.earned_money += rate * delta
-                    display_text = f"?? {self.earned_money:.4f}"
-                    main_color = "#E6E6FA"  # 淡紫：提示“锁屏未知”
-                    alpha = 0.95
-                else:
-                    display_text = f"Zz {self.earned_money:.4f}"
-                    main_color = Config.COLOR_PAUSED
-                    alpha = 0.55
-
-            else:
-                # locked_state is False
-                self.lock_start_time_m = None
-                if idle_time >= Config.IDLE_THRESHOLD:
-                    self.earned_money += rate * delta
-                    display_text = f"$$ {self.earned_money:.4f}"
-                    main_color = Config.COLOR_EARNING
-                    alpha = 1.0
-                else:
-                    display_text = f"Zz {self.earned_money:.4f}"
-                    main_color = Config.COLOR_PAUSED
-                    alpha = 0.55
-
-        self.update_ui_if_needed(display_text, main_color, alpha)
-
-        if self.earned_money != earned_before:
+            self.lock_start_time_ns = None
+
+        is_idle = idle_time >= Config.IDLE_THRESHOLD
+        prefix, main_color, alpha, earns, next_interval_ms = self._state_table[
+            (time_status, locked_state, is_idle, self.is_paused)
+        ]
+        # 锁屏带薪超时依赖连续的锁屏时长，查表后单独覆盖
+        if (
+            time_status == "WORKING_HOURS"
+            and self.lock_start_time_ns is not None
+            and now_ns - self.lock_start_time_ns > Config.LOCK_GRACE_PERIOD * NS_PER_SEC
+        ):
+            prefix, main_color, alpha, earns, next_interval_ms = self.LOCK_EXPIRED_STATE
+
+        if earns:
+            self.earned_money += self._today_rate * delta
             self.mark_dirty()
-        self.maybe_save(now_m)
 
-        self.root.after(Config.REFRESH_RATE, self.update_loop)
+        self.update_ui_if_needed(self.format_display(prefix), main_color, alpha)
+
+        if self.save_requested or (self.is_dirty and now_ns - self.last_save_time_ns > SAVE_INTERVAL_NS):
+            self._do_save(now_ns)
+
+        self.schedule_next_tick(next_interval_ms)
+
+    def schedule_next_tick(self, interval_ms: int):
+        # 按截止时间排程：扣除本次 tick 的耗时与 after 的抖动，节奏不累计漂移
+        now_ns = time.perf_counter_ns()
+        self._next_tick_ns += interval_ms * NS_PER_MS
+        if self._next_tick_ns <= now_ns:
+            # 严重落后（休眠唤醒、长时间阻塞）：重新对齐，不补跑错过的 tick
+            self._next_tick_ns = now_ns + interval_ms * NS_PER_MS
+        delay_ms = max(1, (self._next_tick_ns - now_ns) // NS_PER_MS)
+        self._after_id = self.root.after(delay_ms, self.update_loop)
+
+    def suspend_loop(self):
+        # 隐藏期间不计费：直接撤掉定时器，零唤醒；先把未落盘的状态交给写盘线程
+        if self._loop_suspended:
+            return
+        self._loop_suspended = True
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        if self.is_dirty or self.save_requested:
+            self._do_save(time.perf_counter_ns())
+
+    def resume_loop(self):
+        # 由老板键/托盘恢复触发；隐藏时长不计入 delta
+        if not self._loop_suspended:
+            return
+        self._loop_suspended = False
+        now_ns = time.perf_counter_ns()
+        self.last_update_time_ns = now_ns
+        self._next_tick_ns = now_ns
+        self.update_loop()
+
+    def sample_system_state(self, now_ns: int) -> tuple[bool | None, float]:
+        # 锁屏与空闲变化远慢于刷新频率：按 SYSTEM_POLL_INTERVAL 采样，
+        # 中间的 tick 复用锁屏结果，空闲时长按流逝时间外推；
+        # 有会话通知时锁屏状态直接读推送结果，不做系统调用
+        watcher = self.session_watcher
+        if watcher is not None:
+            self._cached_locked = watcher.locked
+        if self._last_sys_poll_ns is None or (now_ns - self._last_sys_poll_ns) >= SYSTEM_POLL_INTERVAL_NS:
+            if watcher is None:
+                self._cached_locked = SystemUtils.is_workstation_locked()
+            self._cached_idle = SystemUtils.get_idle_time()
+            self._last_sys_poll_ns = now_ns
+            return self._cached_locked, self._cached_idle
+        return self._cached_locked, self._cached_idle + (now_ns - self._last_sys_poll_ns) / NS_PER_SEC
+
+    def _on_boss_key_hook(self):
+        # 热键/钩子线程回调：切回 Tk 线程执行
+        self.root.after(0, self.toggle_visibility)
+
+    # 老板键（降级）：边沿触发，独立于计费刷新的低开销轮询
+    def boss_key_loop(self):
+        if SystemUtils.is_key_pressed(Config.BOSS_KEY):
+            if not self.boss_key_pressed:
+                self.toggle_visibility()
+                self.boss_key_pressed = True
+        else:
+            self.boss_key_pressed = False
+        self.root.after(Config.BOSS_KEY_POLL_RATE, self.boss_key_loop)
 
     # 置顶兜底：低频检查
-    def topmost_fallback_check(self, now_m: float):
+    def topmost_fallback_check(self, now_ns: int):
         if self.is_dragging or not self.is_visible or self.is_modal_open:
             return
-        if (now_m - self._last_topmost_fallback_m) < Config.TOPMOST_FALLBACK_CHECK_INTERVAL:
+        if (now_ns - self._last_topmost_fallback_ns) < TOPMOST_FALLBACK_CHECK_INTERVAL_NS:
             return
-        self._last_topmost_fallback_m = now_m
+        self._last_topmost_fallback_ns = now_ns
         # 不做频繁反复 set topmost，只偶尔 lift 一次
         self.lift_soft()
 
@@ -309,6 +533,8 @@ class FishMoneyApp(FishMoneyUI):
         self,
         time_status: str,
         now: datetime,
+        minute_of_day: int,
+        today: str,
         idle_time: float,
         locked_state: bool | None,
     ):
@@ -318,7 +544,11 @@ class FishMoneyApp(FishMoneyUI):
             return
         if idle_time >= Config.IDLE_THRESHOLD:
             return
-        today = now.strftime("%Y-%m-%d")
+        # 同一天同一分钟内无需重复格式化和比较
+        usage_minute = (self._today_ord, minute_of_day)
+        if usage_minute == self._last_usage_minute:
+            return
+        self._last_usage_minute = usage_minute
         time_str = now.strftime("%H:%M")
         if self.last_after_work_usage.get(today) != time_str:
             self.last_after_work_usage[today] = time_str
@@ -333,6 +563,8 @@ def ensure_single_instance() -> InstanceLock | None:
     try:
         root = tk.Tk()
         root.withdraw()
+        from tkinter import messagebox
+
         messagebox.showinfo("已在运行", "程序已在运行，请先关闭现有实例。")
         root.destroy()
     except Exception:
@@ -1,16 +1,18 @@
-import json
 import os
+import re
 import tkinter as tk
-from tkinter import messagebox
 from datetime import datetime, time as dtime
 
+# 与 strptime("%H:%M") 接受的写法一致（时、分可省略前导零）
+_HHMM_RE = re.compile(r"([01]?\d|2[0-3]):([0-5]?\d)")
+
 
 # ==========================================
 # 配置区域 (Configuration)
 # ==========================================
 class Config:
-    APP_VERSION = "v0.4.11"
-    APP_VERSION_TYPE = "bugfix"
+    APP_VERSION = "v0.10.17"
+    APP_VERSION_TYPE = "refactor"
 
     # —— 会被首次配置覆盖的参数（默认值）——
     MONTHLY_SALARY = 20000.0
@@ -25,6 +27,11 @@ class Config:
     LUNCH_END = dtime(14, 0)
     WORK_START = dtime(9, 0)
     WORK_END = dtime(18, 0)
+    # 主循环按“当天第几分钟”比较，随上面的时间一起更新
+    LUNCH_START_MIN = 12 * 60
+    LUNCH_END_MIN = 14 * 60
+    WORK_START_MIN = 9 * 60
+    WORK_END_MIN = 18 * 60
 
     # 周末摸鱼倍率
     WEEKEND_MULTIPLIER = 2.0
@@ -40,7 +47,10 @@ class Config:
 
     WINDOW_WIDTH = 130
     WINDOW_HEIGHT = 25
-    REFRESH_RATE = 100  # ms
+    REFRESH_RATE = 100  # ms，计费跳字时的刷新间隔
+    IDLE_REFRESH_RATE = 300  # ms，Zz 空闲等待摸鱼判定
+    SLOW_REFRESH_RATE = 500  # ms，暂停/午休/下班等金额不变的状态
+    BOSS_KEY_POLL_RATE = 100  # ms，老板键独立轮询，保持响应
 
     MENU_BG = "#FFFFFF"
     MENU_FG = "#111827"
@@ -61,8 +71,13 @@ class Config:
     # 稳定性参数
     MAX_DELTA = 1.0
     SAVE_INTERVAL = 10.0
+    # 常规落盘不 fsync（只保证 tmp + replace 原子替换），正常退出时强制持久化一次
+    DURABLE_WRITES = False
     HISTORY_RETENTION_DAYS = 365
 
+    # 锁屏/空闲状态采样间隔 (秒)，两次采样之间复用缓存值
+    SYSTEM_POLL_INTERVAL = 0.5
+
     # 置顶兜底检查（很低频，避免顶牛）
     TOPMOST_FALLBACK_CHECK_INTERVAL = 2.0
 
@@ -87,16 +102,15 @@ class SettingsManager:
 
     @staticmethod
     def load_or_none() -> dict | None:
-        from storage import StoragePaths
+        from storage import JsonIO, StoragePaths
 
         settings_file = StoragePaths.settings_file()
         StoragePaths.migrate_legacy_files(StoragePaths.legacy_settings_files(), settings_file)
-        if not os.path.exists(settings_file):
-            return None
         try:
-            with open(settings_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
+            return JsonIO.read(settings_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
             # 配置损坏：备份并当作首次启动
             try:
                 ts = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -107,15 +121,15 @@ class SettingsManager:
 
     @staticmethod
     def save(settings: dict):
-        from storage import StoragePaths
+        from storage import JsonIO, StoragePaths
 
-        settings_file = StoragePaths.settings_file()
-        tmp = settings_file + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(settings, f, ensure_ascii=False, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
-        os.replace(tmp, settings_file)
+        data = JsonIO.dumps(settings, pretty=True)
+        try:
+            JsonIO.atomic_write(StoragePaths.settings_file(), data, fsync=Config.DURABLE_WRITES)
+        except FileNotFoundError:
+            # 目录缓存失效（运行中被删）：重建后再写一次
+            StoragePaths.invalidate()
+            JsonIO.atomic_write(StoragePaths.settings_file(), data, fsync=Config.DURABLE_WRITES)
 
     @staticmethod
     def apply_to_config(settings: dict):
@@ -134,35 +148,45 @@ class SettingsManager:
         Config.LUNCH_START = SettingsManager._parse_hhmm(settings["LUNCH_START"])
         Config.LUNCH_END = SettingsManager._parse_hhmm(settings["LUNCH_END"])
         Config.WORK_END = SettingsManager._parse_hhmm(settings["WORK_END"])
+        Config.LUNCH_START_MIN = Config.LUNCH_START.hour * 60 + Config.LUNCH_START.minute
+        Config.LUNCH_END_MIN = Config.LUNCH_END.hour * 60 + Config.LUNCH_END.minute
+        Config.WORK_END_MIN = Config.WORK_END.hour * 60 + Config.WORK_END.minute
 
     @staticmethod
     def _parse_hhmm(s: str) -> dtime:
-        dt = datetime.strptime(s.strip(), "%H:%M")
-        return dtime(dt.hour, dt.minute)
+        m = _HHMM_RE.fullmatch(s.strip())
+        if m is None:
+            raise ValueError(f"时间格式应为 HH:MM：{s}")
+        return dtime(int(m.group(1)), int(m.group(2)))
 
 
 class SettingsDialog(tk.Toplevel):
     """配置弹窗（首次启动 / 手动重新配置）。"""
 
-    def __init__(self, master: tk.Tk, initial: dict, title="配置"):
+    # (标签, 配置键, 提示)：变量与表单行都由这张表生成
+    FIELDS = (
+        ("月薪", "MONTHLY_SALARY", "例如 20000"),
+        ("月工作天数", "WORK_DAYS_PER_MONTH", "例如 21.75"),
+        ("日工作时长(小时)", "WORK_HOURS_PER_DAY", "例如 8"),
+        ("摸鱼判定阈值(秒)", "IDLE_THRESHOLD", "空闲≥此值算摸鱼"),
+        ("锁屏带薪时长(分钟)", "LOCK_GRACE_PERIOD_MIN", "例如 30"),
+        ("午休开始(HH:MM)", "LUNCH_START", "例如 12:00"),
+        ("午休结束(HH:MM)", "LUNCH_END", "例如 14:00"),
+        ("下班时间(HH:MM)", "WORK_END", "例如 18:00"),
+        ("周末倍率", "WEEKEND_MULTIPLIER", "例如 2"),
+    )
+
+    def __init__(self, master: tk.Tk, initial: dict, title="配置", on_close=None):
         super().__init__(master)
         self.title(title)
         self.resizable(False, False)
         self.attributes("-topmost", True)
 
         self.result = None
+        # 给了 on_close 时关闭只隐藏并回调，弹窗可用 populate 复用；否则直接销毁（首次启动配置）
+        self.on_close = on_close
 
-        self.vars = {
-            "MONTHLY_SALARY": tk.StringVar(value=str(initial["MONTHLY_SALARY"])),
-            "WORK_DAYS_PER_MONTH": tk.StringVar(value=str(initial["WORK_DAYS_PER_MONTH"])),
-            "WORK_HOURS_PER_DAY": tk.StringVar(value=str(initial["WORK_HOURS_PER_DAY"])),
-            "IDLE_THRESHOLD": tk.StringVar(value=str(initial["IDLE_THRESHOLD"])),
-            "LOCK_GRACE_PERIOD_MIN": tk.StringVar(value=str(initial["LOCK_GRACE_PERIOD_MIN"])),
-            "LUNCH_START": tk.StringVar(value=str(initial["LUNCH_START"])),
-            "LUNCH_END": tk.StringVar(value=str(initial["LUNCH_END"])),
-            "WORK_END": tk.StringVar(value=str(initial["WORK_END"])),
-            "WEEKEND_MULTIPLIER": tk.StringVar(value=str(initial["WEEKEND_MULTIPLIER"])),
-        }
+        self.vars = {key: tk.StringVar(value=str(initial[key])) for _, key, _ in SettingsDialog.FIELDS}
 
         self._build_ui()
         self._center()
@@ -172,6 +196,26 @@ class SettingsDialog(tk.Toplevel):
         # 模态（延迟到窗口可见后再 grab，避免菜单残留 grab 导致弹窗闪退）
         self.after_idle(self._activate_modal)
 
+    def populate(self, settings: dict):
+        """回填配置并重新显示已隐藏的弹窗。"""
+        self.result = None
+        for _, key, _ in SettingsDialog.FIELDS:
+            self.vars[key].set(str(settings[key]))
+        self.deiconify()
+        self._center()
+        self.after_idle(self._activate_modal)
+
+    def _close(self):
+        if self.on_close is None:
+            self.destroy()
+            return
+        try:
+            self.grab_release()
+        except tk.TclError:
+            pass
+        self.withdraw()
+        self.on_close()
+
     def _activate_modal(self):
         try:
             self.grab_set()
@@ -184,21 +228,15 @@ class SettingsDialog(tk.Toplevel):
         frm = tk.Frame(self)
         frm.pack(padx=pad, pady=pad)
 
-        def row(r, label, key, hint=""):
-            tk.Label(frm, text=label, anchor="w", width=18).grid(row=r, column=0, sticky="w", padx=(0, 8), pady=4)
-            tk.Entry(frm, textvariable=self.vars[key], width=18).grid(row=r, column=1, sticky="w", pady=4)
+        field_width = 18
+        hint_fg = "#666666"
+        for r, (label, key, hint) in enumerate(SettingsDialog.FIELDS):
+            tk.Label(frm, text=label, anchor="w", width=field_width).grid(
+                row=r, column=0, sticky="w", padx=(0, 8), pady=4
+            )
+            tk.Entry(frm, textvariable=self.vars[key], width=field_width).grid(row=r, column=1, sticky="w", pady=4)
             if hint:
-                tk.Label(frm, text=hint, fg="#666666", anchor="w").grid(row=r, column=2, sticky="w", padx=(8, 0), pady=4)
-
-        row(0, "月薪", "MONTHLY_SALARY", "例如 20000")
-        row(1, "月工作天数", "WORK_DAYS_PER_MONTH", "例如 21.75")
-        row(2, "日工作时长(小时)", "WORK_HOURS_PER_DAY", "例如 8")
-        row(3, "摸鱼判定阈值(秒)", "IDLE_THRESHOLD", "空闲≥此值算摸鱼")
-        row(4, "锁屏带薪时长(分钟)", "LOCK_GRACE_PERIOD_MIN", "例如 30")
-        row(5, "午休开始(HH:MM)", "LUNCH_START", "例如 12:00")
-        row(6, "午休结束(HH:MM)", "LUNCH_END", "例如 14:00")
-        row(7, "下班时间(HH:MM)", "WORK_END", "例如 18:00")
-        row(8, "周末倍率", "WEEKEND_MULTIPLIER", "例如 2")
+                tk.Label(frm, text=hint, fg=hint_fg, anchor="w").grid(row=r, column=2, sticky="w", padx=(8, 0), pady=4)
 
         btns = tk.Frame(self)
         btns.pack(padx=pad, pady=(0, pad), fill="x")
@@ -218,7 +256,7 @@ class SettingsDialog(tk.Toplevel):
 
     def _on_cancel(self):
         self.result = None
-        self.destroy()
+        self._close()
 
     def _on_ok(self):
         try:
@@ -245,17 +283,14 @@ class SettingsDialog(tk.Toplevel):
             if s["WEEKEND_MULTIPLIER"] <= 0:
                 raise ValueError("周末倍率必须 > 0")
 
-            # 时间格式校验
-            SettingsManager._parse_hhmm(s["LUNCH_START"])
-            SettingsManager._parse_hhmm(s["LUNCH_END"])
-            SettingsManager._parse_hhmm(s["WORK_END"])
-
-            # 午休逻辑校验
+            # 时间格式校验（每个字段只解析一次）
             ls = SettingsManager._parse_hhmm(s["LUNCH_START"])
             le = SettingsManager._parse_hhmm(s["LUNCH_END"])
+            we = SettingsManager._parse_hhmm(s["WORK_END"])
+
+            # 午休逻辑校验
             if not (ls < le):
                 raise ValueError("午休开始必须早于午休结束")
-            we = SettingsManager._parse_hhmm(s["WORK_END"])
             if not (Config.WORK_START < we):
                 raise ValueError("下班时间必须晚于上班时间")
             if not (ls >= Config.WORK_START):
@@ -264,7 +299,9 @@ class SettingsDialog(tk.Toplevel):
                 raise ValueError("午休结束必须早于下班时间")
 
             self.result = s
-            self.destroy()
+            self._close()
 
         except Exception as e:
+            from tkinter import messagebox
+
             messagebox.showerror("配置有误", str(e), parent=self)
@@ -1,16 +1,28 @@
+import hashlib
 import json
 import logging
 import os
-from datetime import datetime, timedelta
+import queue
+import threading
+from datetime import date, datetime, timedelta
 
 from config import Config
 from system_utils import SystemUtils
 
+try:
+    import orjson
+except ImportError:  # 可选依赖：未安装时回退标准库 json
+    orjson = None
+
 
 # ==========================================
 # 路径管理（本地数据持久化）
 # ==========================================
 class StoragePaths:
+    # 已确保存在的数据目录与解析好的文件路径；目录被外部删除导致写盘失败时由 invalidate 清空
+    _ensured_dir: str | None = None
+    _file_paths: dict[str, str] = {}
+
     @staticmethod
     def data_dir() -> str:
         appdata = os.getenv("APPDATA")
@@ -22,21 +34,37 @@ class StoragePaths:
 
     @staticmethod
     def ensure_dir() -> str:
-        path = StoragePaths.data_dir()
-        os.makedirs(path, exist_ok=True)
+        path = StoragePaths._ensured_dir
+        if path is None:
+            path = StoragePaths.data_dir()
+            os.makedirs(path, exist_ok=True)
+            StoragePaths._ensured_dir = path
+        return path
+
+    @staticmethod
+    def invalidate():
+        StoragePaths._ensured_dir = None
+        StoragePaths._file_paths.clear()
+
+    @staticmethod
+    def _file(name: str) -> str:
+        path = StoragePaths._file_paths.get(name)
+        if path is None:
+            path = os.path.join(StoragePaths.ensure_dir(), name)
+            StoragePaths._file_paths[name] = path
         return path
 
     @staticmethod
     def data_file() -> str:
-        return os.path.join(StoragePaths.ensure_dir(), Config.DATA_FILE_NAME)
+        return StoragePaths._file(Config.DATA_FILE_NAME)
 
     @staticmethod
     def settings_file() -> str:
-        return os.path.join(StoragePaths.ensure_dir(), Config.SETTINGS_FILE_NAME)
+        return StoragePaths._file(Config.SETTINGS_FILE_NAME)
 
     @staticmethod
     def instance_lock_file() -> str:
-        return os.path.join(StoragePaths.ensure_dir(), "app.lock")
+        return StoragePaths._file("app.lock")
 
     @staticmethod
     def legacy_data_files() -> list[str]:
@@ -59,26 +87,88 @@ class StoragePaths:
     def migrate_legacy_files(legacy_paths: list[str], target_path: str):
         if os.path.exists(target_path):
             return
+        # 目标目录已由 ensure_dir 建好；直接尝试移动，不存在的旧文件由异常跳过，省去逐个 stat
         for legacy_path in legacy_paths:
-            if not os.path.exists(legacy_path):
-                continue
             try:
-                os.makedirs(os.path.dirname(target_path), exist_ok=True)
                 os.replace(legacy_path, target_path)
                 return
+            except FileNotFoundError:
+                continue
             except Exception:
                 pass
 
 
+# ==========================================
+# JSON 读写（orjson 优先 + 字节级原子写）
+# ==========================================
+class JsonIO:
+    # 目标路径 -> 临时文件路径，每个文件只拼接一次
+    _tmp_paths: dict[str, str] = {}
+
+    @staticmethod
+    def dumps(obj, pretty: bool = False) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+        return json.dumps(obj, ensure_ascii=False, indent=2 if pretty else None).encode("utf-8")
+
+    @staticmethod
+    def loads(data: bytes):
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def read(path: str):
+        with open(path, "rb") as f:
+            return JsonIO.loads(f.read())
+
+    @staticmethod
+    def atomic_write(path: str, data: bytes, fsync: bool = False):
+        # 直接写 fd，绕过 Python 文件对象的缓冲层；O_BINARY 避免 Windows 换行转换
+        # tmp + os.replace 保证替换本身原子；fsync 只在需要持久化保证时开启
+        tmp = JsonIO._tmp_paths.get(path)
+        if tmp is None:
+            tmp = JsonIO._tmp_paths[path] = path + ".tmp"
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        fd = os.open(tmp, flags, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            if fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+
+
 # ==========================================
 # 数据管理（原子写 + 损坏备份）
 # ==========================================
 class DataManager:
     _logger = logging.getLogger(__name__)
+    # 上次成功落盘内容的摘要，内容不变时跳过写盘
+    _last_saved_digest: bytes | None = None
+    # 上次按保留期裁剪时的日期
+    _last_prune_day: str = ""
+    # 当天日期字符串缓存
+    _today_ord: int = -1
+    _today_cached: str = ""
+
+    @staticmethod
+    def _digest(payload: bytes) -> bytes:
+        return hashlib.blake2b(payload, digest_size=16).digest()
 
     @staticmethod
     def _today_str() -> str:
-        return datetime.now().strftime("%Y-%m-%d")
+        # 每次保存都要判断是否跨天：按 ordinal 缓存当天字符串，只在换日时格式化
+        now = datetime.now()
+        today_ord = now.toordinal()
+        if today_ord != DataManager._today_ord:
+            DataManager._today_cached = f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
+            DataManager._today_ord = today_ord
+        return DataManager._today_cached
 
     @staticmethod
     def _prune_date_map(
@@ -88,44 +178,78 @@ class DataManager:
             return history
         now = now or datetime.now()
         cutoff_date = now.date() - timedelta(days=Config.HISTORY_RETENTION_DAYS - 1)
-        pruned: dict[str, float] | dict[str, str] = {}
+        # 键是定长 YYYY-MM-DD，字典序即日期序：直接和截止日期字符串比较，不逐个 strptime
+        cutoff_str = cutoff_date.isoformat()
+        return {
+            date_key: value
+            for date_key, value in history.items()
+            if (
+                date_key >= cutoff_str
+                if len(date_key) == 10 and date_key[4] == "-" and date_key[7] == "-"
+                else DataManager._keep_irregular_key(date_key, cutoff_date)
+            )
+        }
+
+    @staticmethod
+    def _keep_irregular_key(date_key: str, cutoff_date: date) -> bool:
+        # 非标准格式的键：按原逻辑解析，解析不了的原样保留
+        try:
+            return datetime.strptime(date_key, "%Y-%m-%d").date() >= cutoff_date
+        except Exception:
+            return True
+
+    @staticmethod
+    def prune(
+        history: dict[str, float], last_after_work_usage: dict[str, str], now: datetime | None = None
+    ) -> tuple[dict[str, float], dict[str, str]]:
+        """按保留期裁剪历史与下班用量；载入和跨天时调用，同一天内的保存不再重复裁剪。"""
+        return (
+            DataManager._prune_date_map(history, now),
+            DataManager._prune_date_map(last_after_work_usage, now),
+        )
+
+    @staticmethod
+    def _coerce_history(history: dict) -> dict[str, float]:
+        # 单条转不成数字时只跳过该条，其余历史照常保留
+        result = {}
         for date_key, value in history.items():
             try:
-                parsed_date = datetime.strptime(date_key, "%Y-%m-%d").date()
-            except Exception:
-                pruned[date_key] = value
+                result[date_key] = float(value)
+            except (TypeError, ValueError):
                 continue
-            if parsed_date >= cutoff_date:
-                pruned[date_key] = value
-        return pruned
-
-    @staticmethod
-    def _prune_history(history: dict[str, float], now: datetime | None = None) -> dict[str, float]:
-        pruned = DataManager._prune_date_map(history, now)
-        return {date_key: float(value) for date_key, value in pruned.items()}
+        return result
 
     @staticmethod
     def load():
         today = DataManager._today_str()
         data_file = StoragePaths.data_file()
         StoragePaths.migrate_legacy_files(StoragePaths.legacy_data_files(), data_file)
-        if not os.path.exists(data_file):
-            return today, 0.0, "", {}, {}
-
         try:
-            with open(data_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            # 直接打开，不存在时由 FileNotFoundError 判断，不再先 exists 多一次 stat
+            with open(data_file, "rb") as f:
+                raw = f.read()
+            data = JsonIO.loads(raw)
+            # 以磁盘现有内容作为摘要起点：启动后内容没变的首次保存也能跳过
+            DataManager._last_saved_digest = DataManager._digest(raw)
 
             _ = data.get("schema_version", Config.DATA_SCHEMA_VERSION)
             file_date = data.get("date") or today
             money = float(data.get("money", 0.0))
             settled_date = data.get("settled_date", "")
-            history = data.get("history", {})
             last_after_work_usage = data.get("last_after_work_usage", {})
+            # 先裁剪再转换：过期条目里的脏值随裁剪丢弃，不会把整个文件当成损坏
+            history, last_after_work_usage = DataManager.prune(data.get("history", {}), last_after_work_usage)
+            DataManager._last_prune_day = today
+            # 数值只在载入时统一转一次 float，之后追加的值本身就是 float
+            history = DataManager._coerce_history(history)
 
             return file_date, money, settled_date, history, last_after_work_usage
 
-        except Exception:
+        except FileNotFoundError:
+            return today, 0.0, "", {}, {}
+        except (OSError, ValueError, TypeError, AttributeError):
+            # 读不出或内容不合法（JSONDecodeError 属于 ValueError，字段类型不对是 TypeError/AttributeError）：
+            # 备份原文件后按首次启动处理；其它异常不吞，避免把程序缺陷当成数据损坏
             try:
                 ts = datetime.now().strftime("%Y%m%d_%H%M%S")
                 os.replace(data_file, f"{data_file}.corrupt.{ts}")
@@ -140,34 +264,123 @@ class DataManager:
         settled_date: str,
         history: dict[str, float],
         last_after_work_usage: dict[str, str],
+        durable: bool = False,
     ):
         try:
-            pruned_history = DataManager._prune_history(history)
-            pruned_last_usage = DataManager._prune_date_map(last_after_work_usage)
+            # 截止日期按天变化：同一天内已裁剪过就直接用（调用方在跨天时也会裁剪自身状态）
+            today = DataManager._today_str()
+            if today != DataManager._last_prune_day:
+                history, last_after_work_usage = DataManager.prune(history, last_after_work_usage)
+                DataManager._last_prune_day = today
             data = {
                 "schema_version": Config.DATA_SCHEMA_VERSION,
                 "date": date_str,
-                "money": float(money),
+                "money": money,
                 "settled_date": settled_date,
-                "history": pruned_history,
-                "last_after_work_usage": pruned_last_usage,
+                "history": history,
+                "last_after_work_usage": last_after_work_usage,
             }
-            data_file = StoragePaths.data_file()
-            tmp = data_file + ".tmp"
-
-            with open(tmp, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False)
-                f.flush()
-                os.fsync(f.fileno())
-            os.replace(tmp, data_file)
+            payload = JsonIO.dumps(data)
+            digest = DataManager._digest(payload)
+            if digest == DataManager._last_saved_digest and not durable:
+                return
+            JsonIO.atomic_write(
+                StoragePaths.data_file(), payload, fsync=durable or Config.DURABLE_WRITES
+            )
+            DataManager._last_saved_digest = digest
+        except FileNotFoundError:
+            # 数据目录运行中被删：清掉路径缓存，下次重试时重新建目录
+            StoragePaths.invalidate()
+            DataManager._logger.exception("保存数据失败")
+            raise
         except Exception:
             DataManager._logger.exception("保存数据失败")
             raise
 
     @staticmethod
     def append_history(history: dict[str, float], date_str: str, money: float) -> dict[str, float]:
+        # O(1) 追加；保留期裁剪延后到 save 统一处理
         history[str(date_str)] = float(money)
-        return DataManager._prune_history(history)
+        return history
+
+
+# ==========================================
+# 后台写盘（单槽队列，最新快照优先）
+# ==========================================
+class DataWriter:
+    """在后台线程里调用 DataManager.save，主循环只投递快照不等待磁盘。
+
+    队列只有一个槽位，来不及写的旧快照直接被新快照顶掉；
+    每个快照带递增序号，保证同步写与后台写交错时不会用旧数据覆盖新数据。
+    """
+
+    _STOP = object()
+
+    def __init__(self, on_error=None):
+        self._on_error = on_error
+        self._queue: queue.Queue = queue.Queue(maxsize=1)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._written_seq = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="DataWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot: tuple, durable: bool = False):
+        if self._closed:
+            self.save_now(snapshot, durable)
+            return
+        seq = self._next_seq()
+        while True:
+            try:
+                self._queue.put_nowait((seq, snapshot, durable))
+                return
+            except queue.Full:
+                try:
+                    dropped = self._queue.get_nowait()
+                except queue.Empty:
+                    continue
+                # 被顶掉的快照要求持久化时，由新快照继承，结算落盘不会被合并丢失
+                if dropped is not DataWriter._STOP and dropped[2]:
+                    durable = True
+
+    def save_now(self, snapshot: tuple, durable: bool = False):
+        """同步写盘（退出、重置等需要立即落盘的场景），失败时抛出异常。"""
+        self._write(self._next_seq(), snapshot, durable)
+
+    def close(self, timeout: float = 2.0):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(DataWriter._STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is DataWriter._STOP:
+                return
+            seq, snapshot, durable = item
+            try:
+                self._write(seq, snapshot, durable)
+            except Exception:
+                # 在写盘线程里回调，调用方负责切回 Tk 线程；带上 durable，重试时仍会 fsync
+                if self._on_error is not None:
+                    self._on_error(durable)
+
+    def _write(self, seq: int, snapshot: tuple, durable: bool = False):
+        with self._lock:
+            if seq < self._written_seq:
+                return
+            DataManager.save(*snapshot, durable=durable)
+            self._written_seq = seq
 
 
 class InstanceLock:
@@ -1,5 +1,7 @@
 import os
 import ctypes
+import queue
+import threading
 from ctypes import wintypes
 
 
@@ -7,26 +9,122 @@ from ctypes import wintypes
 # 系统底层 API
 # ==========================================
 class SystemUtils:
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+    # 每 tick 都要查询空闲时间：结构体与 byref 只建一次，cbSize 固定
+    _lii = LASTINPUTINFO()
+    _lii.cbSize = ctypes.sizeof(LASTINPUTINFO)
+    _lii_ref = ctypes.byref(_lii)
+
     if os.name == "nt":
-        user32 = ctypes.windll.user32
-        kernel32 = ctypes.windll.kernel32
+        # 自持 WinDLL 句柄：函数原型只属于本模块，不与 tkinter/pystray 共用的 windll 互相覆盖；
+        # 调用方只看返回值，不需要 use_last_error 的 LastError 拷贝
+        user32 = ctypes.WinDLL("user32", use_last_error=False)
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=False)
+        wtsapi32 = ctypes.WinDLL("wtsapi32", use_last_error=False)
+        LRESULT = ctypes.c_ssize_t
+        HOOKPROC = ctypes.WINFUNCTYPE(LRESULT, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+        WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+        class WNDCLASSW(ctypes.Structure):
+            pass
+
+        # 嵌套类体看不到外层类作用域的 WNDPROC，字段在这里补上
+        WNDCLASSW._fields_ = [
+            ("style", wintypes.UINT),
+            ("lpfnWndProc", WNDPROC),
+            ("cbClsExtra", ctypes.c_int),
+            ("cbWndExtra", ctypes.c_int),
+            ("hInstance", wintypes.HINSTANCE),
+            ("hIcon", wintypes.HICON),
+            ("hCursor", wintypes.HANDLE),
+            ("hbrBackground", wintypes.HBRUSH),
+            ("lpszMenuName", wintypes.LPCWSTR),
+            ("lpszClassName", wintypes.LPCWSTR),
+        ]
+        _GetLastInputInfo = user32.GetLastInputInfo
+        _GetTickCount64 = kernel32.GetTickCount64
     else:
         user32 = None
         kernel32 = None
+        wtsapi32 = None
+        _GetLastInputInfo = None
+        _GetTickCount64 = None
 
-    class LASTINPUTINFO(ctypes.Structure):
-        _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+    @staticmethod
+    def _declare_prototypes():
+        """一次性声明用到的 Win32 函数原型（含 ui 里的窗口样式调用）。
+
+        不声明时 ctypes 每次调用都要推断参数类型，且返回值默认按 c_int 截断，
+        64 位下的 HDESK/HANDLE 会被截断。
+        """
+        user32 = SystemUtils.user32
+        kernel32 = SystemUtils.kernel32
+        wtsapi32 = SystemUtils.wtsapi32
+        prototypes = (
+            (user32.GetLastInputInfo, [ctypes.POINTER(SystemUtils.LASTINPUTINFO)], wintypes.BOOL),
+            (user32.OpenInputDesktop, [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD], wintypes.HDESK),
+            (user32.CloseDesktop, [wintypes.HDESK], wintypes.BOOL),
+            (user32.GetAsyncKeyState, [ctypes.c_int], wintypes.SHORT),
+            (
+                user32.SetWindowsHookExW,
+                [ctypes.c_int, SystemUtils.HOOKPROC, wintypes.HINSTANCE, wintypes.DWORD],
+                wintypes.HHOOK,
+            ),
+            (
+                user32.CallNextHookEx,
+                [wintypes.HHOOK, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM],
+                SystemUtils.LRESULT,
+            ),
+            (user32.UnhookWindowsHookEx, [wintypes.HHOOK], wintypes.BOOL),
+            (user32.RegisterHotKey, [wintypes.HWND, ctypes.c_int, wintypes.UINT, wintypes.UINT], wintypes.BOOL),
+            (user32.UnregisterHotKey, [wintypes.HWND, ctypes.c_int], wintypes.BOOL),
+            (user32.GetMessageW, [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT], wintypes.BOOL),
+            (user32.TranslateMessage, [ctypes.POINTER(wintypes.MSG)], wintypes.BOOL),
+            (user32.DispatchMessageW, [ctypes.POINTER(wintypes.MSG)], SystemUtils.LRESULT),
+            (
+                user32.PostThreadMessageW,
+                [wintypes.DWORD, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM],
+                wintypes.BOOL,
+            ),
+            (user32.RegisterClassW, [ctypes.POINTER(SystemUtils.WNDCLASSW)], wintypes.ATOM),
+            (
+                user32.CreateWindowExW,
+                [
+                    wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+                    ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                    wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID,
+                ],
+                wintypes.HWND,
+            ),
+            (
+                user32.DefWindowProcW,
+                [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM],
+                SystemUtils.LRESULT,
+            ),
+            (user32.DestroyWindow, [wintypes.HWND], wintypes.BOOL),
+            (wtsapi32.WTSRegisterSessionNotification, [wintypes.HWND, wintypes.DWORD], wintypes.BOOL),
+            (wtsapi32.WTSUnRegisterSessionNotification, [wintypes.HWND], wintypes.BOOL),
+            (kernel32.GetTickCount64, [], ctypes.c_uint64),
+            (kernel32.GetCurrentThreadId, [], wintypes.DWORD),
+            (kernel32.GetModuleHandleW, [wintypes.LPCWSTR], wintypes.HMODULE),
+            (kernel32.OpenProcess, [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD], wintypes.HANDLE),
+            (kernel32.GetExitCodeProcess, [wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD)], wintypes.BOOL),
+            (kernel32.CloseHandle, [wintypes.HANDLE], wintypes.BOOL),
+        )
+        for func, argtypes, restype in prototypes:
+            func.argtypes = argtypes
+            func.restype = restype
 
     @staticmethod
     def get_idle_time() -> float:
         if SystemUtils.user32 is None or SystemUtils.kernel32 is None:
             return 0.0
-        lii = SystemUtils.LASTINPUTINFO()
-        lii.cbSize = ctypes.sizeof(SystemUtils.LASTINPUTINFO)
-        if not SystemUtils.user32.GetLastInputInfo(ctypes.byref(lii)):
+        if not SystemUtils._GetLastInputInfo(SystemUtils._lii_ref):
             return 0.0
-        now = SystemUtils.kernel32.GetTickCount()
-        elapsed_ms = (now - lii.dwTime) & 0xFFFFFFFF
+        # dwTime 仍是 32 位的 GetTickCount 值，差值按 2**32 取模即可跨越回绕
+        elapsed_ms = (SystemUtils._GetTickCount64() - SystemUtils._lii.dwTime) & 0xFFFFFFFF
         return elapsed_ms / 1000.0
 
     @staticmethod
@@ -36,17 +134,15 @@ class SystemUtils:
         - OpenInputDesktop 可用时较可靠
         - 但在某些权限/远程/安全软件环境会失败：此时返回 None，不做武断误判
         """
-        if SystemUtils.user32 is None or SystemUtils.kernel32 is None:
+        user32 = SystemUtils.user32
+        if user32 is None:
             return None
-        DESKTOP_SWITCHDESKTOP = 0x0100
-        try:
-            hDesktop = SystemUtils.user32.OpenInputDesktop(0, False, DESKTOP_SWITCHDESKTOP)
-            if hDesktop == 0:
-                return None
-            SystemUtils.user32.CloseDesktop(hDesktop)
-            return False
-        except Exception:
+        # 原型已声明，失败只体现在返回 NULL，不会抛异常；0x0100 = DESKTOP_SWITCHDESKTOP
+        hDesktop = user32.OpenInputDesktop(0, False, 0x0100)
+        if not hDesktop:
             return None
+        user32.CloseDesktop(hDesktop)
+        return False
 
     @staticmethod
     def is_key_pressed(vk_code: int) -> bool:
@@ -80,3 +176,276 @@ class SystemUtils:
             return exit_code.value == STILL_ACTIVE
         finally:
             SystemUtils.kernel32.CloseHandle(handle)
+
+
+if SystemUtils.user32 is not None:
+    SystemUtils._declare_prototypes()
+
+
+# ==========================================
+# 全局热键（老板键，事件驱动）
+# ==========================================
+class HotKey:
+    """RegisterHotKey 注册的系统热键：只有按下时系统才投递 WM_HOTKEY，平时零开销。
+
+    热键会被本程序独占（其它程序收不到该键），因此只作为 KeyHook 装不上时的后备；
+    已被占用时注册失败，调用方再降级为轮询。callback 运行在热键线程（非 Tk 线程）。
+    """
+
+    WM_HOTKEY = 0x0312
+    WM_QUIT = 0x0012
+    MOD_NOREPEAT = 0x4000
+    HOTKEY_ID = 1
+
+    def __init__(self, vk_code: int, callback):
+        self.vk_code = vk_code
+        self.callback = callback
+        self._ready = threading.Event()
+        self._registered = False
+        self._thread_id = None
+
+    @staticmethod
+    def install(vk_code: int, callback) -> "HotKey | None":
+        """注册成功返回 HotKey，非 Windows 或热键被占用返回 None。"""
+        if SystemUtils.user32 is None or SystemUtils.kernel32 is None:
+            return None
+        hotkey = HotKey(vk_code, callback)
+        threading.Thread(target=hotkey._run, name="HotKey", daemon=True).start()
+        hotkey._ready.wait(1.0)
+        if not hotkey._registered:
+            return None
+        return hotkey
+
+    def stop(self):
+        if self._thread_id is None:
+            return
+        try:
+            SystemUtils.user32.PostThreadMessageW(self._thread_id, HotKey.WM_QUIT, 0, 0)
+        except Exception:
+            pass
+        self._thread_id = None
+
+    def _run(self):
+        user32 = SystemUtils.user32
+        try:
+            self._thread_id = SystemUtils.kernel32.GetCurrentThreadId()
+            # hwnd 传 NULL：WM_HOTKEY 投递到本线程的消息队列
+            self._registered = bool(
+                user32.RegisterHotKey(None, HotKey.HOTKEY_ID, HotKey.MOD_NOREPEAT, self.vk_code)
+            )
+        except Exception:
+            self._registered = False
+        finally:
+            self._ready.set()
+        if not self._registered:
+            return
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            if msg.message == HotKey.WM_HOTKEY and msg.wParam == HotKey.HOTKEY_ID:
+                try:
+                    self.callback()
+                except Exception:
+                    pass
+        user32.UnregisterHotKey(None, HotKey.HOTKEY_ID)
+        self._registered = False
+
+
+# ==========================================
+# 全局按键钩子（老板键，事件驱动）
+# ==========================================
+class KeyHook:
+    """WH_KEYBOARD_LL 低层键盘钩子：按下指定键时回调，不拦截按键本身。
+
+    钩子过程必须尽快返回（超时会被系统摘除），所以只把事件投进队列，
+    由单独的分发线程执行 callback；callback 因此运行在非 Tk 线程。
+    """
+
+    WH_KEYBOARD_LL = 13
+    HC_ACTION = 0
+    WM_KEYDOWN = 0x0100
+    WM_KEYUP = 0x0101
+    WM_SYSKEYDOWN = 0x0104
+    WM_SYSKEYUP = 0x0105
+    WM_QUIT = 0x0012
+
+    class KBDLLHOOKSTRUCT(ctypes.Structure):
+        _fields_ = [
+            ("vkCode", wintypes.DWORD),
+            ("scanCode", wintypes.DWORD),
+            ("flags", wintypes.DWORD),
+            ("time", wintypes.DWORD),
+            ("dwExtraInfo", ctypes.c_size_t),
+        ]
+
+    def __init__(self, vk_code: int, callback):
+        self.vk_code = vk_code
+        self.callback = callback
+        self._pressed = False
+        self._events: queue.SimpleQueue = queue.SimpleQueue()
+        self._ready = threading.Event()
+        self._hook = None
+        self._proc = None
+        self._thread_id = None
+
+    @staticmethod
+    def install(vk_code: int, callback) -> "KeyHook | None":
+        """安装成功返回 KeyHook，非 Windows 或安装失败返回 None（调用方自行降级轮询）。"""
+        if SystemUtils.user32 is None or SystemUtils.kernel32 is None:
+            return None
+        hook = KeyHook(vk_code, callback)
+        threading.Thread(target=hook._dispatch, name="KeyHookDispatch", daemon=True).start()
+        threading.Thread(target=hook._run, name="KeyHook", daemon=True).start()
+        hook._ready.wait(1.0)
+        if not hook._hook:
+            return None
+        return hook
+
+    def stop(self):
+        if self._thread_id is None:
+            return
+        try:
+            SystemUtils.user32.PostThreadMessageW(self._thread_id, KeyHook.WM_QUIT, 0, 0)
+        except Exception:
+            pass
+        self._thread_id = None
+
+    def _run(self):
+        user32 = SystemUtils.user32
+        kernel32 = SystemUtils.kernel32
+        try:
+            self._thread_id = kernel32.GetCurrentThreadId()
+            # 回调对象必须保持引用，否则被回收后系统会调到野指针
+            self._proc = SystemUtils.HOOKPROC(self._hook_proc)
+            self._hook = user32.SetWindowsHookExW(
+                KeyHook.WH_KEYBOARD_LL, self._proc, kernel32.GetModuleHandleW(None), 0
+            )
+        except Exception:
+            self._hook = None
+        finally:
+            self._ready.set()
+        if not self._hook:
+            return
+
+        # 低层钩子在安装线程的消息循环中被调用
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWindowsHookEx(self._hook)
+        self._hook = None
+
+    def _hook_proc(self, n_code, w_param, l_param):
+        if n_code == KeyHook.HC_ACTION:
+            info = ctypes.cast(l_param, ctypes.POINTER(KeyHook.KBDLLHOOKSTRUCT)).contents
+            if info.vkCode == self.vk_code:
+                if w_param in (KeyHook.WM_KEYDOWN, KeyHook.WM_SYSKEYDOWN):
+                    # 边沿触发：按住不放时的自动重复不再回调
+                    if not self._pressed:
+                        self._pressed = True
+                        self._events.put(None)
+                elif w_param in (KeyHook.WM_KEYUP, KeyHook.WM_SYSKEYUP):
+                    self._pressed = False
+        return SystemUtils.user32.CallNextHookEx(None, n_code, w_param, l_param)
+
+    def _dispatch(self):
+        while True:
+            self._events.get()
+            try:
+                self.callback()
+            except Exception:
+                pass
+
+
+# ==========================================
+# 会话锁屏通知（事件驱动）
+# ==========================================
+class SessionWatcher:
+    """WTS 会话通知：锁屏/解锁由系统推送到隐藏的消息窗口，主循环只读 locked。
+
+    消息窗口与消息循环跑在独立线程，不动 Tk 自己的窗口过程；
+    locked 初值取一次 OpenInputDesktop 检测，之后只随通知更新。
+    """
+
+    WM_WTSSESSION_CHANGE = 0x02B1
+    WTS_SESSION_LOCK = 0x7
+    WTS_SESSION_UNLOCK = 0x8
+    NOTIFY_FOR_THIS_SESSION = 0
+    HWND_MESSAGE = -3
+    WM_QUIT = 0x0012
+    CLASS_NAME = "FishTouchingCoinSessionWatcher"
+
+    def __init__(self):
+        self.locked: bool | None = SystemUtils.is_workstation_locked()
+        self._ready = threading.Event()
+        self._hwnd = None
+        self._proc = None
+        self._wndclass = None
+        self._thread_id = None
+
+    @staticmethod
+    def install() -> "SessionWatcher | None":
+        """注册成功返回 SessionWatcher，非 Windows 或注册失败返回 None（调用方继续轮询）。"""
+        if SystemUtils.wtsapi32 is None:
+            return None
+        watcher = SessionWatcher()
+        threading.Thread(target=watcher._run, name="SessionWatcher", daemon=True).start()
+        watcher._ready.wait(1.0)
+        if not watcher._hwnd:
+            return None
+        return watcher
+
+    def stop(self):
+        if self._thread_id is None:
+            return
+        try:
+            SystemUtils.user32.PostThreadMessageW(self._thread_id, SessionWatcher.WM_QUIT, 0, 0)
+        except Exception:
+            pass
+        self._thread_id = None
+
+    def _run(self):
+        user32 = SystemUtils.user32
+        try:
+            self._thread_id = SystemUtils.kernel32.GetCurrentThreadId()
+            h_instance = SystemUtils.kernel32.GetModuleHandleW(None)
+            # 窗口过程与窗口类结构都要保持引用
+            self._proc = SystemUtils.WNDPROC(self._wnd_proc)
+            self._wndclass = SystemUtils.WNDCLASSW()
+            self._wndclass.lpfnWndProc = self._proc
+            self._wndclass.hInstance = h_instance
+            self._wndclass.lpszClassName = SessionWatcher.CLASS_NAME
+            user32.RegisterClassW(ctypes.byref(self._wndclass))
+            hwnd = user32.CreateWindowExW(
+                0, SessionWatcher.CLASS_NAME, None, 0, 0, 0, 0, 0,
+                SessionWatcher.HWND_MESSAGE, None, h_instance, None,
+            )
+            if hwnd and not SystemUtils.wtsapi32.WTSRegisterSessionNotification(
+                hwnd, SessionWatcher.NOTIFY_FOR_THIS_SESSION
+            ):
+                user32.DestroyWindow(hwnd)
+                hwnd = None
+            self._hwnd = hwnd
+        except Exception:
+            self._hwnd = None
+        finally:
+            self._ready.set()
+        if not self._hwnd:
+            return
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        SystemUtils.wtsapi32.WTSUnRegisterSessionNotification(self._hwnd)
+        user32.DestroyWindow(self._hwnd)
+        self._hwnd = None
+
+    def _wnd_proc(self, hwnd, msg, w_param, l_param):
+        if msg == SessionWatcher.WM_WTSSESSION_CHANGE:
+            if w_param == SessionWatcher.WTS_SESSION_LOCK:
+                self.locked = True
+            elif w_param == SessionWatcher.WTS_SESSION_UNLOCK:
+                self.locked = False
+            return 0
+        return SystemUtils.user32.DefWindowProcW(hwnd, msg, w_param, l_param)
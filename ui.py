@@ -1,64 +1,47 @@
-import ctypes
 import os
 import threading
 from datetime import datetime, timedelta
 
 import tkinter as tk
-from tkinter import messagebox
-import pystray
-from PIL import Image
+import tkinter.font as tkfont
 
 from config import Config, SettingsDialog, SettingsManager
-from storage import DataManager
+
+TRAY_ICON_PATH = os.path.join(os.path.dirname(__file__), "app.ico")
+
+# 明细窗口的趋势图布局与配色
+DETAILS_DAYS = 7
+DETAILS_BAR_WIDTH = 120
+DETAILS_BAR_HEIGHT = 8
+DETAILS_TEXT_MUTED = "#6B7280"
+DETAILS_WEEKEND_COLOR = "#F97316"
+DETAILS_HIGHLIGHT_COLOR = "#2563EB"
 
 
 class FishMoneyUI:
+    # 实例属性由 FishMoneyApp.__slots__ 声明
+    __slots__ = ()
+
+    # 托盘图标缓存（类级，进程内共享）
+    _tray_image_cache = None
+
     def setup_window(self):
         self.root.overrideredirect(True)
         self.root.configure(bg=Config.BG_KEY_COLOR)
         self.root.wm_attributes("-transparentcolor", Config.BG_KEY_COLOR)
-        self.root.attributes("-topmost", True)
+        self._set_topmost(True)
 
         sw, sh = self.root.winfo_screenwidth(), self.root.winfo_screenheight()
         self.root.geometry(f"{Config.WINDOW_WIDTH}x{Config.WINDOW_HEIGHT}+{sw-150}+{sh-80}")
 
-    def _update_windows_exstyle(self, to_toolwindow: bool):
-        if os.name != "nt":
-            return
-        try:
-            hwnd = self.root.winfo_id()
-            user32 = ctypes.windll.user32
-            gwl_exstyle = -20
-            ws_ex_appwindow = 0x00040000
-            ws_ex_toolwindow = 0x00000080
-            swp_nomove = 0x0002
-            swp_nosize = 0x0001
-            swp_nozorder = 0x0004
-            swp_framechanged = 0x0020
-            exstyle = user32.GetWindowLongW(hwnd, gwl_exstyle)
-            if self._original_exstyle is None:
-                self._original_exstyle = exstyle
-            if to_toolwindow:
-                new_exstyle = (exstyle & ~ws_ex_appwindow) | ws_ex_toolwindow
-            else:
-                if self._original_exstyle is None:
-                    return
-                new_exstyle = self._original_exstyle
-            if new_exstyle != exstyle:
-                user32.SetWindowLongW(hwnd, gwl_exstyle, new_exstyle)
-                user32.SetWindowPos(
-                    hwnd,
-                    0,
-                    0,
-                    0,
-                    0,
-                    0,
-                    swp_nomove | swp_nosize | swp_nozorder | swp_framechanged,
-                )
-        except Exception:
-            pass
-
     def create_widgets(self):
+        # 具名字体只解析一次，金额描边、菜单和明细窗口都引用同一份
+        self._money_font = tkfont.Font(
+            root=self.root, family=Config.FONT_FAMILY, size=Config.FONT_SIZE, weight="bold"
+        )
+        self._text_font = tkfont.Font(root=self.root, family=Config.FONT_FAMILY, size=Config.FONT_SIZE)
+        self._title_font = tkfont.Font(root=self.root, family=Config.FONT_FAMILY, size=10, weight="bold")
+
         self.canvas = tk.Canvas(
             self.root,
             width=Config.WINDOW_WIDTH,
@@ -70,26 +53,27 @@ class FishMoneyUI:
         )
         self.canvas.pack(fill="both", expand=True)
 
-        self.text_ids = []
-        offsets = [(0, -1), (0, 1), (-1, 0), (1, 0)]
-        for ox, oy in offsets:
-            tid = self.canvas.create_text(
+        # 描边阴影：颜色固定，创建后只随文本更新，id 用不可变元组保存
+        offsets = ((0, -1), (0, 1), (-1, 0), (1, 0))
+        self.text_ids = tuple(
+            self.canvas.create_text(
                 Config.WINDOW_WIDTH - 5 + ox, 12 + oy,
                 text="",
-                font=(Config.FONT_FAMILY, Config.FONT_SIZE, "bold"),
+                font=self._money_font,
                 fill=Config.COLOR_OUTLINE,
                 anchor="e",
-                tags=("drag",),
+                tags=("drag", "outline", "money"),
             )
-            self.text_ids.append(tid)
+            for ox, oy in offsets
+        )
 
         self.main_text_id = self.canvas.create_text(
             Config.WINDOW_WIDTH - 5, 12,
             text="",
-            font=(Config.FONT_FAMILY, Config.FONT_SIZE, "bold"),
+            font=self._money_font,
             fill=Config.COLOR_PAUSED,
             anchor="e",
-            tags=("drag",),
+            tags=("drag", "money"),
         )
 
     # —— 5) 右键菜单 ——
@@ -105,15 +89,16 @@ class FishMoneyUI:
             bd=1,
             activeborderwidth=0,
         )
+        # 菜单收起时只会触发 Unmap；菜单仅在退出时随根窗口销毁，无需再绑 Destroy
         self.menu.bind("<Unmap>", self._on_menu_unmap)
-        self.menu.bind("<Destroy>", self._on_menu_destroy)
-        menu_font = (Config.FONT_FAMILY, Config.FONT_SIZE)
+        menu_font = self._text_font
         self.menu.add_command(
             label="暂停计费",
             command=self._menu_action(self.toggle_pause),
             font=menu_font,
         )
         self.menu_pause_index = 0
+        self._menu_pause_label = "暂停计费"
         self.menu.add_command(
             label="详情",
             command=self._menu_action(self.open_details),
@@ -138,36 +123,39 @@ class FishMoneyUI:
         self.menu.configure(selectcolor=Config.MENU_ACTIVE_BG)
 
     def bind_events(self):
+        # 画布的 bindtags 含根窗口，只绑在 root 上即可覆盖画布与文字，每个事件只回调一次
         # 拖动：左键
-        for w in (self.root, self.canvas):
-            w.bind("<ButtonPress-1>", self.start_move)
-            w.bind("<B1-Motion>", self.do_move)
-            w.bind("<ButtonRelease-1>", self.stop_move)
-
-            # 右键：弹菜单
-            w.bind("<Button-3>", self.show_menu)
+        self.root.bind("<ButtonPress-1>", self.start_move)
+        self.root.bind("<B1-Motion>", self.do_move)
+        self.root.bind("<ButtonRelease-1>", self.stop_move)
 
-        self.canvas.tag_bind("drag", "<ButtonPress-1>", self.start_move)
-        self.canvas.tag_bind("drag", "<B1-Motion>", self.do_move)
-        self.canvas.tag_bind("drag", "<ButtonRelease-1>", self.stop_move)
-        self.canvas.tag_bind("drag", "<Button-3>", self.show_menu)
+        # 右键：弹菜单
+        self.root.bind("<Button-3>", self.show_menu)
 
         # —— 4) 置顶：事件驱动反击 ——
-        self.root.bind("<Map>", lambda e: self.lift_once())
-        self.root.bind("<FocusOut>", lambda e: self.lift_soft())
-        self.root.bind("<Visibility>", lambda e: self.lift_soft())
+        self.root.bind("<Map>", self.lift_once)
+        self.root.bind("<FocusOut>", self.lift_soft)
+        self.root.bind("<Visibility>", self.lift_soft)
         self.root.bind("<Unmap>", self.on_minimize)
 
-    # 置顶（强）
-    def lift_once(self):
+    def _set_topmost(self, value: bool):
+        # 置顶状态记在 Python 侧，读取时不必再向 Tk 查询
+        self.root.attributes("-topmost", value)
+        self._topmost_state = value
+
+    # 置顶（强）：即使已置顶也重新设置一次，用于把窗口顶回最上层
+    def lift_once(self, event=None):
+        # 收进托盘或被老板键藏起时置顶没有意义，省掉 Tcl 与窗口管理器往返
+        if self.is_in_tray or not self.is_visible:
+            return
         try:
-            self.root.attributes("-topmost", True)
+            self._set_topmost(True)
             self.root.lift()
         except Exception:
             pass
 
     # 置顶（柔）：稍后反击，避免和某些窗口疯狂顶牛
-    def lift_soft(self):
+    def lift_soft(self, event=None):
         if (
             not self.is_visible
             or self.is_dragging
@@ -175,18 +163,21 @@ class FishMoneyUI:
             or self.is_context_menu_open
         ):
             return
+        # FocusOut/Visibility 顶牛时一秒能来几十次：已有待执行的反击就不再追加
+        if self._lift_after_id is not None:
+            return
         try:
-            self.root.after(80, self.lift_once)
+            self._lift_after_id = self.root.after(80, self._lift_and_clear)
         except Exception:
             pass
 
+    def _lift_and_clear(self):
+        self._lift_after_id = None
+        self.lift_once()
+
     def on_minimize(self, event):
-        # 最小化时收到托盘
+        # 最小化时收到托盘：hide_to_tray 里直接 withdraw，is_in_tray 挡住 withdraw 引发的再次 Unmap
         if self.root.state() == "iconic":
-            try:
-                self.root.after_idle(self.root.withdraw)
-            except Exception:
-                pass
             self.hide_to_tray()
 
     def hide_to_tray(self):
@@ -195,7 +186,14 @@ class FishMoneyUI:
 
         self.is_in_tray = True
         self.is_visible = False
-        self._update_windows_exstyle(True)
+        # 收进托盘后不再需要反击置顶，撤掉还没执行的那次
+        if self._lift_after_id is not None:
+            try:
+                self.root.after_cancel(self._lift_after_id)
+            except Exception:
+                pass
+            self._lift_after_id = None
+        self.suspend_loop()
         self.root.withdraw()
         self._start_tray_icon()
 
@@ -205,16 +203,27 @@ class FishMoneyUI:
 
         self.is_in_tray = False
         self.is_visible = True
-        self._update_windows_exstyle(False)
         self.root.deiconify()
         try:
             self.root.state("normal")
         except Exception:
             pass
         self.lift_once()
-        self._stop_tray_icon()
+        self._hide_tray_icon()
+        self.resume_loop()
 
     def _start_tray_icon(self):
+        # 托盘图标整个进程只注册一次，之后进出托盘只切换可见性
+        if self.tray_icon is not None:
+            try:
+                self.tray_icon.visible = True
+            except Exception:
+                pass
+            return
+
+        # 托盘依赖按需导入：多数会话从不进托盘，不拖慢启动
+        import pystray
+
         def on_show(icon, item):
             self.root.after(0, self.restore_from_tray)
 
@@ -224,20 +233,29 @@ class FishMoneyUI:
         def on_exit(icon, item):
             self.root.after(0, self.on_exit)
 
-        def runner():
-            image = self._load_tray_image()
-            menu = pystray.Menu(
-                pystray.MenuItem("显示窗口", on_show),
-                pystray.MenuItem("详情", on_details),
-                pystray.MenuItem("退出", on_exit),
-            )
-            self.tray_icon = pystray.Icon("FishTouchingCoin", image, "摸鱼币", menu)
-            self.tray_icon.run()
+        def setup(icon):
+            # 启动托盘线程期间可能已经恢复了窗口：以当前状态为准
+            icon.visible = self.is_in_tray
 
-        self.tray_thread = threading.Thread(target=runner, daemon=True)
+        menu = pystray.Menu(
+            pystray.MenuItem("显示窗口", on_show),
+            pystray.MenuItem("详情", on_details),
+            pystray.MenuItem("退出", on_exit),
+        )
+        self.tray_icon = pystray.Icon("FishTouchingCoin", self._load_tray_image(), "摸鱼币", menu)
+        # 托盘消息泵放在守护线程里：即使绕过 on_exit 退出，也不会拖住进程
+        self.tray_thread = threading.Thread(target=self.tray_icon.run, args=(setup,), daemon=True)
         self.tray_thread.start()
 
+    def _hide_tray_icon(self):
+        if self.tray_icon is not None:
+            try:
+                self.tray_icon.visible = False
+            except Exception:
+                pass
+
     def _stop_tray_icon(self):
+        # 仅在退出时注销托盘图标并结束托盘线程
         if self.tray_icon is not None:
             try:
                 self.tray_icon.stop()
@@ -247,86 +265,65 @@ class FishMoneyUI:
             self.tray_thread = None
 
     def _load_tray_image(self):
-        icon_path = os.path.join(os.path.dirname(__file__), "app.ico")
-        try:
-            return Image.open(icon_path)
-        except Exception:
-            return Image.new("RGB", (64, 64), Config.BG_KEY_COLOR)
+        # 图标只解码一次，反复进出托盘复用同一张图
+        image = FishMoneyUI._tray_image_cache
+        if image is None:
+            from PIL import Image
+
+            try:
+                with Image.open(TRAY_ICON_PATH) as icon:
+                    image = icon.copy()
+            except Exception:
+                # 背景键色近乎纯黑，灰度单通道占位图观感一致，内存只有 RGB 的三分之一
+                image = Image.new("L", (64, 64), 0)
+            FishMoneyUI._tray_image_cache = image
+        return image
 
     def open_details(self):
-        if self.details_window is not None:
+        # 明细窗口只建一次：关闭时隐藏，再次打开只刷新画布上已有的图元
+        details = self.details_window
+        if details is not None:
             try:
-                if self.details_window.winfo_exists():
-                    self.details_window.deiconify()
-                    self.details_window.lift()
-                    self.details_window.focus_force()
+                if details.winfo_exists():
+                    self._refresh_details()
+                    details.deiconify()
+                    details.lift()
+                    details.focus_force()
                     return
             except Exception:
                 pass
             self.details_window = None
+            self._details_rows = None
         if self.details_opening:
             return
         self.details_opening = True
         try:
-            details = tk.Toplevel(self.root)
-            self.details_window = details
-            details.title("详情")
-            details.resizable(False, False)
-            details.attributes("-topmost", True)
-
-            def on_details_destroy(event=None):
-                if event is None or event.widget is details:
-                    self.details_window = None
-
-            def on_details_close():
-                on_details_destroy()
-                details.destroy()
-
-            details.protocol("WM_DELETE_WINDOW", on_details_close)
-            details.bind("<Destroy>", on_details_destroy)
+            self._build_details_window()
         finally:
             self.details_opening = False
+        self._refresh_details()
 
-        now = datetime.now()
-        data_map = dict(self.history)
-        data_map[self.current_date] = float(self.earned_money)
+    def _build_details_window(self):
+        details = tk.Toplevel(self.root)
+        self.details_window = details
+        details.title("详情")
+        details.resizable(False, False)
+        details.attributes("-topmost", True)
+
+        # 关闭只隐藏；窗口真被销毁时，open_details 里的 winfo_exists 检查会清掉引用
+        details.protocol("WM_DELETE_WINDOW", details.withdraw)
 
         panel_bg = "#F6F7F9"
         section_bg = "#FFFFFF"
         border_color = "#E3E5E8"
         bar_bg = "#EEF2F6"
         bar_color = "#4A90E2"
-        text_muted = "#6B7280"
 
         details.configure(bg=panel_bg)
 
         container = tk.Frame(details, bg=panel_bg)
         container.pack(padx=12, pady=12, fill="both", expand=True)
 
-        days = []
-        for i in range(6, -1, -1):
-            day = now.date() - timedelta(days=i)
-            day_str = day.strftime("%Y-%m-%d")
-            day_label = day.strftime("%m-%d")
-            is_weekend = day.weekday() >= 5
-            days.append((day_str, day_label, float(data_map.get(day_str, 0.0)), is_weekend))
-
-        max_value = max((value for _, _, value, _ in days), default=0.0)
-        usage_map = dict(getattr(self, "last_after_work_usage", {}) or {})
-        latest_time = None
-        latest_day = None
-        for day_str, _, _, _ in days:
-            time_str = usage_map.get(day_str)
-            if not time_str:
-                continue
-            try:
-                parsed = datetime.strptime(time_str, "%H:%M").time()
-            except Exception:
-                continue
-            if latest_time is None or parsed > latest_time:
-                latest_time = parsed
-                latest_day = day_str
-
         trend_card = tk.Frame(
             container,
             bg=section_bg,
@@ -338,83 +335,133 @@ class FishMoneyUI:
         tk.Label(
             trend_card,
             text="近7天摸鱼趋势",
-            font=(Config.FONT_FAMILY, 10, "bold"),
+            font=self._title_font,
             bg=section_bg,
             fg="#111827",
         ).pack(anchor="w", padx=10, pady=(8, 6))
 
-        list_frame = tk.Frame(trend_card, bg=section_bg)
-        list_frame.pack(padx=10, pady=(0, 10), fill="x")
+        # 7 行趋势画在同一张 Canvas 上；图元建好后只改文字、颜色与进度条长度
+        text_font = self._text_font
+        char_width = text_font.measure("0")
+        row_height = text_font.metrics("linespace") + 4
+        money_x = 6 * char_width
+        bar_x = money_x + 10 * char_width + 8
+        time_right = bar_x + DETAILS_BAR_WIDTH + 8 + 9 * char_width
 
-        bar_canvas_width = 120
-        bar_canvas_height = 8
-        weekend_color = "#F97316"
-        for day_str, day_label, value, is_weekend in days:
-            row = tk.Frame(list_frame, bg=section_bg)
-            row.pack(fill="x", pady=2)
-            time_str = usage_map.get(day_str)
-
-            tk.Label(
-                row,
-                text=day_label,
-                width=6,
-                anchor="w",
-                font=(Config.FONT_FAMILY, Config.FONT_SIZE),
-                bg=section_bg,
-                fg=weekend_color if is_weekend else text_muted,
-            ).pack(side="left")
-
-            tk.Label(
-                row,
-                text=f"￥{value:,.2f}",
-                width=10,
-                anchor="w",
-                font=(Config.FONT_FAMILY, Config.FONT_SIZE),
-                bg=section_bg,
-                fg="#111827",
-            ).pack(side="left", padx=(0, 8))
-
-            bar_canvas = tk.Canvas(
-                row,
-                width=bar_canvas_width,
-                height=bar_canvas_height,
-                bg=section_bg,
-                highlightthickness=0,
-            )
-            bar_canvas.pack(side="left", fill="x", expand=True)
-            bar_canvas.create_rectangle(
-                0,
-                0,
-                bar_canvas_width,
-                bar_canvas_height,
+        chart = tk.Canvas(
+            trend_card,
+            width=time_right,
+            height=row_height * DETAILS_DAYS,
+            bg=section_bg,
+            highlightthickness=0,
+        )
+        chart.pack(padx=10, pady=(0, 10), anchor="w")
+
+        rows = []
+        for index in range(DETAILS_DAYS):
+            mid_y = index * row_height + row_height // 2
+            bar_top = mid_y - DETAILS_BAR_HEIGHT // 2
+            label_id = chart.create_text(0, mid_y, text="", anchor="w", font=text_font)
+            money_id = chart.create_text(money_x, mid_y, text="", anchor="w", font=text_font, fill="#111827")
+            chart.create_rectangle(
+                bar_x,
+                bar_top,
+                bar_x + DETAILS_BAR_WIDTH,
+                bar_top + DETAILS_BAR_HEIGHT,
                 fill=bar_bg,
                 outline=bar_bg,
             )
+            fill_id = chart.create_rectangle(
+                bar_x,
+                bar_top,
+                bar_x,
+                bar_top + DETAILS_BAR_HEIGHT,
+                fill=bar_color,
+                outline=bar_color,
+                state="hidden",
+            )
+            time_id = chart.create_text(time_right, mid_y, text="", anchor="e", font=text_font)
+            rows.append((label_id, money_id, fill_id, time_id, bar_x, bar_top))
+        self._details_rows = (chart, tuple(rows))
+
+    def _refresh_details(self):
+        if self._details_rows is None:
+            return
+        chart, rows = self._details_rows
+
+        # 近 7 天的日期键一天只算一次，跨天后才重建
+        today = datetime.now().date()
+        if self._recent_week_date != today:
+            week = []
+            for i in range(DETAILS_DAYS - 1, -1, -1):
+                day = today - timedelta(days=i)
+                # isoformat 不解析格式串；月-日直接切片，不再第二次 strftime
+                day_str = day.isoformat()
+                week.append((day_str, day_str[5:], day.weekday() >= 5))
+            self._recent_week_keys = tuple(week)
+            self._recent_week_date = today
+
+        # 只按 7 个日期键直接查，不复制整份历史
+        history = self.history
+        days = []
+        for day_str, day_label, is_weekend in self._recent_week_keys:
+            if day_str == self.current_date:
+                value = float(self.earned_money)
+            else:
+                value = float(history.get(day_str, 0.0))
+            days.append((day_str, day_label, value, is_weekend))
+
+        max_value = max((value for _, _, value, _ in days), default=0.0)
+        usage_map = self.last_after_work_usage
+
+        def usage_minutes(day_str: str) -> int:
+            # 记录由 strftime("%H:%M") 写入，定长切片即可，不走 strptime；无记录、非字符串或格式不对返回 -1
+            time_str = usage_map.get(day_str)
+            if not isinstance(time_str, str) or len(time_str) != 5 or time_str[2] != ":":
+                return -1
+            try:
+                return int(time_str[:2]) * 60 + int(time_str[3:])
+            except ValueError:
+                return -1
+
+        # 最晚下班的那天高亮；同分取较早的一天，与逐个比较的写法一致
+        latest_minutes, latest_day = max(
+            ((usage_minutes(day_str), day_str) for day_str, _, _, _ in days),
+            key=lambda item: item[0],
+            default=(-1, None),
+        )
+        if latest_minutes < 0:
+            latest_day = None
+
+        itemconfigure = chart.itemconfigure
+        for (day_str, day_label, value, is_weekend), row in zip(days, rows):
+            label_id, money_id, fill_id, time_id, bar_x, bar_top = row
+            itemconfigure(
+                label_id,
+                text=day_label,
+                fill=DETAILS_WEEKEND_COLOR if is_weekend else DETAILS_TEXT_MUTED,
+            )
+            itemconfigure(money_id, text=f"￥{value:,.2f}")
+
             if max_value > 0:
-                fill_width = int(round((value / max_value) * bar_canvas_width))
+                fill_width = int(round((value / max_value) * DETAILS_BAR_WIDTH))
             else:
                 fill_width = 0
             if fill_width > 0:
-                bar_canvas.create_rectangle(
-                    0,
-                    0,
-                    fill_width,
-                    bar_canvas_height,
-                    fill=bar_color,
-                    outline=bar_color,
-                )
+                chart.coords(fill_id, bar_x, bar_top, bar_x + fill_width, bar_top + DETAILS_BAR_HEIGHT)
+                itemconfigure(fill_id, state="normal")
+            else:
+                itemconfigure(fill_id, state="hidden")
 
+            time_str = usage_map.get(day_str)
             if time_str:
-                time_color = "#2563EB" if day_str == latest_day else text_muted
-                tk.Label(
-                    row,
+                itemconfigure(
+                    time_id,
                     text=f"下班 {time_str}",
-                    width=9,
-                    anchor="e",
-                    font=(Config.FONT_FAMILY, Config.FONT_SIZE),
-                    bg=section_bg,
-                    fg=time_color,
-                ).pack(side="right", padx=(8, 0))
+                    fill=DETAILS_HIGHLIGHT_COLOR if day_str == latest_day else DETAILS_TEXT_MUTED,
+                )
+            else:
+                itemconfigure(time_id, text="")
 
     # 拖动
     def start_move(self, event):
@@ -423,15 +470,39 @@ class FishMoneyUI:
         win_y = self.root.winfo_y()
         self.drag_offset_x = event.x_root - win_x
         self.drag_offset_y = event.y_root - win_y
+        self._last_move = (win_x, win_y)
 
     def do_move(self, event):
         if not self.is_dragging:
             return
-        x = event.x_root - self.drag_offset_x
-        y = event.y_root - self.drag_offset_y
-        self.root.geometry(f"+{x}+{y}")
+        # 高回报率鼠标每秒上百次 Motion：只记下最新位置，约每帧移动一次窗口
+        self._pending_move = (event.x_root - self.drag_offset_x, event.y_root - self.drag_offset_y)
+        if self._move_after_id is None:
+            self._move_after_id = self.root.after(16, self._flush_move)
+
+    def _flush_move(self):
+        self._move_after_id = None
+        if self._pending_move is None:
+            return
+        move = self._pending_move
+        self._pending_move = None
+        # 一帧内鼠标又回到原处时位置没变，不必再让窗口管理器移动一次
+        if move == self._last_move:
+            return
+        self._last_move = move
+        x, y = move
+        # 直接走 Tcl 的 wm geometry，拖动时省掉 Tkinter 包装层的一层调用
+        root = self.root
+        root.tk.call("wm", "geometry", root._w, "+%d+%d" % (x, y))
 
     def stop_move(self, event):
+        # 松手时把最后一个位置立即落到窗口上
+        if self._move_after_id is not None:
+            try:
+                self.root.after_cancel(self._move_after_id)
+            except Exception:
+                pass
+        self._flush_move()
         self.is_dragging = False
         # 拖完再抬一下，避免被拖动过程夺顶后“沉下去”
         self.lift_soft()
@@ -443,20 +514,29 @@ class FishMoneyUI:
         elif self.is_visible:
             self.root.withdraw()
             self.is_visible = False
+            self.suspend_loop()
         else:
             self.root.deiconify()
             self.is_visible = True
             self.lift_once()
+            self.resume_loop()
 
     # —— 5) 右键菜单动作 ——
     def show_menu(self, event):
+        if self.menu is None:
+            self.create_context_menu()
         self.is_context_menu_open = True
         try:
             label = "继续计费" if self.is_paused else "暂停计费"
-            try:
-                self.menu.entryconfigure(self.menu_pause_index, label=label)
-            except Exception:
-                pass
+            # 暂停状态没变时不重配菜单项，省一次 Tcl 往返
+            if label != self._menu_pause_label:
+                try:
+                    self.menu.entryconfigure(self.menu_pause_index, label=label)
+                    self._menu_pause_label = label
+                except Exception:
+                    pass
+            # tk_popup 会隐式加 grab：记下来，之后的 _release_grab 才需要真正去查
+            self._grab_pending = True
             self.menu.tk_popup(event.x_root, event.y_root)
             self.root.after_idle(self._focus_menu)
         except Exception:
@@ -502,19 +582,15 @@ class FishMoneyUI:
         if event.widget is self.menu:
             self.is_context_menu_open = False
 
-    def _on_menu_destroy(self, event):
-        if event.widget is self.menu:
-            self.is_context_menu_open = False
-
     def _release_grab(self):
-        try:
-            grab_widget = self.root.grab_current()
-        except Exception:
-            grab_widget = None
-        if grab_widget is None:
+        # 只有弹出过菜单后才可能残留 grab；查过一次即清除标记，避免每次都往返 Tcl
+        if not self._grab_pending:
             return
+        self._grab_pending = False
         try:
-            grab_widget.grab_release()
+            grab_widget = self.root.grab_current()
+            if grab_widget is not None:
+                grab_widget.grab_release()
         except Exception:
             pass
 
@@ -524,18 +600,16 @@ class FishMoneyUI:
 
     def open_settings(self):
         self._release_grab()
-        if self.settings_dialog is not None:
-            try:
-                if self.settings_dialog.winfo_exists():
-                    self.settings_dialog.deiconify()
-                    self.settings_dialog.lift()
-                    self.settings_dialog.focus_force()
-                    return
-            except Exception:
-                pass
-            self.settings_dialog = None
-
         if self._settings_opening:
+            # 弹窗已开着（或正在打开）：顶到前面即可
+            dlg = self.settings_dialog
+            if dlg is not None:
+                try:
+                    if dlg.winfo_viewable():
+                        dlg.lift()
+                        dlg.focus_force()
+                except Exception:
+                    pass
             return
 
         self._settings_opening = True
@@ -548,22 +622,13 @@ class FishMoneyUI:
         # 打开配置：以当前 settings 为初值
         cur = SettingsManager.load_or_none() or SettingsManager.defaults()
         self.is_modal_open = True
-        was_topmost = self.root.attributes("-topmost")
-        self.root.attributes("-topmost", False)
-        dlg = None
+        was_topmost = self._topmost_state
+        self._set_topmost(False)
+        dlg = self.settings_dialog
         try:
-            dlg = SettingsDialog(self.root, cur, title="重新配置")
-            self.settings_dialog = dlg
-            dlg.transient(self.root)
-            dlg.wait_visibility()
-            dlg.focus_force()
-
-            def finalize_dialog(event=None):
-                if event is not None and event.widget is not dlg:
-                    return
+            def finalize_dialog():
                 self.is_modal_open = False
                 self._settings_opening = False
-                self.settings_dialog = None
                 try:
                     if dlg.grab_current() is not None:
                         dlg.grab_release()
@@ -571,7 +636,7 @@ class FishMoneyUI:
                         self.root.grab_release()
                 except Exception:
                     pass
-                self.root.attributes("-topmost", was_topmost)
+                self._set_topmost(was_topmost)
 
                 if dlg.result is None:
                     return
@@ -579,14 +644,25 @@ class FishMoneyUI:
                 try:
                     SettingsManager.save(dlg.result)
                     SettingsManager.apply_to_config(dlg.result)
-                    self.base_salary_per_second = self.calculate_base_rate()
+                    self.refresh_rates()
                     # 配置变了，避免锁屏计时残留
-                    self.lock_start_time_m = None
+                    self.lock_start_time_ns = None
                     self.lift_soft()
                 except Exception as e:
+                    from tkinter import messagebox
+
                     messagebox.showerror("保存失败", str(e), parent=self.root)
 
-            dlg.bind("<Destroy>", finalize_dialog)
+            # 弹窗只建一次：关闭时隐藏并回调 finalize_dialog，再次打开回填当前配置
+            if dlg is not None and dlg.winfo_exists():
+                dlg.on_close = finalize_dialog
+                dlg.populate(cur)
+            else:
+                dlg = SettingsDialog(self.root, cur, title="重新配置", on_close=finalize_dialog)
+                self.settings_dialog = dlg
+                dlg.transient(self.root)
+            dlg.wait_visibility()
+            dlg.focus_force()
         except Exception:
             self.is_modal_open = False
             self._settings_opening = False
@@ -598,41 +674,35 @@ class FishMoneyUI:
                     self.root.grab_release()
             except Exception:
                 pass
-            self.root.attributes("-topmost", was_topmost)
+            self._set_topmost(was_topmost)
 
     def reset_today(self):
+        from tkinter import messagebox
+
         if not messagebox.askyesno("确认", "确定要把今日金额清零吗？", parent=self.root):
             return
         self.earned_money = 0.0
-        self.lock_start_time_m = None
-        try:
-            DataManager.save(
-                self.current_date,
-                self.earned_money,
-                self.settled_date,
-                self.history,
-                self.last_after_work_usage,
-            )
-        except Exception:
-            pass
+        self.lock_start_time_ns = None
+        # 交给后台写盘线程，慢盘 fsync 不卡界面；写失败时 on_error 会重新标脏，下个保存间隔静默重试
+        snapshot = self.data_snapshot()
+        self.data_writer.submit(snapshot, durable=True)
+        # 记为已投递，下一次 _do_save 不再把同一份清零状态序列化写一遍
+        self._last_saved_snapshot = snapshot
         self.lift_soft()
 
     def confirm_exit(self):
+        from tkinter import messagebox
+
         if not messagebox.askyesno("退出", "确定退出吗？", parent=self.root):
             return
         self.on_exit()
 
     def on_exit(self, event=None):
         try:
-            DataManager.save(
-                self.current_date,
-                self.earned_money,
-                self.settled_date,
-                self.history,
-                self.last_after_work_usage,
-            )
+            self.data_writer.save_now(self.data_snapshot(), durable=True)
         except Exception:
             pass
+        self.data_writer.close()
         self._stop_tray_icon()
         try:
             self.root.destroy()